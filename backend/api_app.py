@@ -1,19 +1,34 @@
+import base64
+import csv
+import io
+import json
 import os
+import sqlite3
 import uuid
+import zlib
 from datetime import datetime
 from typing import List as PyList, Optional
 
-from fastapi import FastAPI, Depends, HTTPException, status, Query
+from collections import Counter
+from fastapi import FastAPI, Depends, HTTPException, status, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from pydantic import BaseModel, Field
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func, and_
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
+from starlette.background import BackgroundTask
+from sqlalchemy.orm import Session, joinedload, load_only, noload, selectinload
+from sqlalchemy import and_, or_, inspect as sa_inspect, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import SQLAlchemyError
 import yaml
 
 # 📦 Modèles ORM / Dataclasses cockpit
 from OliPLUS.OliPLUS.oli_db_models import get_db, OliDocORM, OliDocTypeORM, OliMetaTypeORM, OliDocMetadataORM
 from OliPLUS.OliPLUS.oliplus_models import OliDoc, OliDocType, OliMetaType, OliDocMetadata
+# 📊 Compteurs par type (importer le module enregistre le suivi des flushs ORM)
+from backend.stats.doc_stats import apply_deltas, install as install_stats, read_stats, reconcile
 
 # ✅ Initialisation cockpit API
 api_app = FastAPI(
@@ -32,6 +47,7 @@ api_app.add_middleware(
     allow_credentials=cors_config["allow_credentials"],
     allow_methods=cors_config["allow_methods"],
     allow_headers=cors_config["allow_headers"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # 🔐 Authentification cockpit
@@ -50,10 +66,259 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
 class DocStat(BaseModel):
     type: str
     nb_documents: int
+    as_of: datetime = Field(..., description="Dernière mise à jour du compteur")
 
 class IngestPayload(BaseModel):
     document: OliDoc = Field(..., description="Document à ingérer")
 
+# 🧭 Filtres et pagination des documents
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+def doc_filters(
+    type_id: Optional[int] = None,
+    statut: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+) -> list:
+    """Critères SQL communs aux listes et exports de documents."""
+    filters = []
+    if type_id:
+        filters.append(OliDocORM.doc_type_id == type_id)
+    if statut:
+        filters.append(OliDocORM.statut == statut)
+    if created_after:
+        filters.append(OliDocORM.created_at >= created_after)
+    if created_before:
+        filters.append(OliDocORM.created_at <= created_before)
+    return filters
+
+def encode_cursor(doc: OliDocORM) -> str:
+    payload = json.dumps({"c": doc.created_at.isoformat() if doc.created_at else None, "i": doc.id})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        created_at = datetime.fromisoformat(payload["c"]) if payload["c"] else None
+        return created_at, int(payload["i"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Curseur de pagination invalide")
+
+def after_cursor(created_at: Optional[datetime], doc_id: int):
+    """Keyset sur (created_at, id), documents sans date en dernier (cf. ``nulls_last`` du tri de list_docs)."""
+    if created_at is None:
+        return and_(OliDocORM.created_at.is_(None), OliDocORM.id > doc_id)
+    return or_(
+        OliDocORM.created_at > created_at,
+        and_(OliDocORM.created_at == created_at, OliDocORM.id > doc_id),
+        OliDocORM.created_at.is_(None),
+    )
+
+def parse_fields(fields: Optional[str]) -> Optional[PyList[str]]:
+    """Projection ``fields=a,b`` validée contre les champs d’OliDoc (None : document complet)."""
+    if not fields:
+        return None
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = set(requested) - set(OliDoc.__dataclass_fields__)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Champs inconnus : {', '.join(sorted(unknown))}")
+    return requested
+
+# 📤 Exports en flux
+EXPORT_BATCH_SIZE = 1000
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+def _ndjson_chunks(rows):
+    batch = []
+    for row in rows:
+        batch.append(json.dumps(row, ensure_ascii=False))
+        if len(batch) >= EXPORT_BATCH_SIZE:
+            yield ("\n".join(batch) + "\n").encode("utf-8")
+            batch = []
+    if batch:
+        yield ("\n".join(batch) + "\n").encode("utf-8")
+
+def _csv_chunks(rows):
+    """CSV à plat : en-tête tiré de la première ligne, valeurs imbriquées sérialisées en JSON."""
+    buffer = io.StringIO()
+    writer, count = None, 0
+    for row in rows:
+        if writer is None:
+            writer = csv.DictWriter(buffer, fieldnames=list(row), extrasaction="ignore")
+            writer.writeheader()
+        writer.writerow({
+            k: json.dumps(v, ensure_ascii=False) if isinstance(v, (dict, list)) else v
+            for k, v in row.items()
+        })
+        count += 1
+        if count % EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+def _gzip_chunks(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 : conteneur gzip
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+def stream_export(make_query, fmt: str, compress: bool, filename: str) -> StreamingResponse:
+    """
+    Réponse en flux des lignes de ``make_query(session)`` (objets ORM avec ``to_dataclass``).
+
+    La session est ouverte ici et non via ``Depends(get_db)`` : FastAPI ferme les
+    dépendances à ``yield`` avant l’envoi du corps d’une StreamingResponse.
+    """
+    db_gen = get_db()
+    db = next(db_gen)
+
+    def body():
+        try:
+            query = make_query(db).yield_per(EXPORT_BATCH_SIZE)
+            rows = (jsonable_encoder(obj.to_dataclass()) for obj in query)
+            chunks = _ndjson_chunks(rows) if fmt == "ndjson" else _csv_chunks(rows)
+            yield from (_gzip_chunks(chunks) if compress else chunks)
+        finally:
+            db_gen.close()
+
+    # gzip=true : téléchargement d’un fichier .gz (application/gzip), et non un encodage de
+    # transfert que les clients HTTP décompresseraient avant d’enregistrer sous le nom .gz.
+    headers = {"Content-Disposition": f'attachment; filename="{filename}.{fmt}{".gz" if compress else ""}"'}
+    media_type = "application/gzip" if compress else EXPORT_MEDIA_TYPES[fmt]
+    # La tâche de fond ferme la session si le client part avant le premier octet.
+    return StreamingResponse(
+        body(), media_type=media_type, headers=headers, background=BackgroundTask(db_gen.close),
+    )
+
+# 📥 Ingestion en masse
+DEFAULT_BULK_BATCH_SIZE = 500
+MAX_BULK_BATCH_SIZE = 5000
+_doc_adapter = TypeAdapter(OliDoc)
+
+def doc_values(doc_data: OliDoc) -> dict:
+    """Colonnes d’un document ingéré (création unitaire ou en masse)."""
+    return {
+        "uuid": doc_data.uuid or str(uuid.uuid4()),
+        "nom": doc_data.nom,
+        "description": doc_data.description,
+        "chemin_fichier": doc_data.chemin_fichier,
+        "statut": "importé",
+        "created_at": doc_data.created_at,
+        "updated_at": doc_data.updated_at,
+    }
+
+def _max_bind_params(dialect: str) -> int:
+    """Paramètres liés admis par requête (SQLite < 3.32 : 999 ; valeur prudente hors PostgreSQL/SQLite)."""
+    if dialect == "postgresql":
+        return 65535
+    if dialect == "sqlite":
+        return 32766 if sqlite3.sqlite_version_info >= (3, 32) else 999
+    return 2000
+
+def _insert_docs(db: Session, rows: PyList[dict]) -> dict:
+    """
+    INSERT multi-lignes idempotent sur ``uuid`` ; retourne {uuid: (id, doc_type_id)} des lignes créées.
+    ON CONFLICT DO NOTHING en PostgreSQL/SQLite, filtrage préalable des uuid existants ailleurs.
+    Le lot est découpé en requêtes bornées par la limite de paramètres du dialecte.
+    """
+    dialect = db.get_bind().dialect.name
+    per_statement = max(1, _max_bind_params(dialect) // len(rows[0]))
+    created = {}
+    for start in range(0, len(rows), per_statement):
+        created.update(_insert_docs_statement(db, dialect, rows[start:start + per_statement]))
+    return created
+
+def _insert_docs_statement(db: Session, dialect: str, rows: PyList[dict]) -> dict:
+    returning = (OliDocORM.id, OliDocORM.uuid, OliDocORM.doc_type_id)
+    if dialect in ("postgresql", "sqlite"):
+        dialect_insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        stmt = dialect_insert(OliDocORM).values(rows).on_conflict_do_nothing(index_elements=["uuid"])
+    else:
+        existing = set(db.scalars(select(OliDocORM.uuid).where(OliDocORM.uuid.in_([r["uuid"] for r in rows]))))
+        rows = [r for r in rows if r["uuid"] not in existing]
+        if not rows:
+            return {}
+        stmt = insert(OliDocORM).values(rows)
+    return {u: (i, t) for i, u, t in db.execute(stmt.returning(*returning)).all()}
+
+def _ingest_batch(db: Session, batch: PyList[tuple]) -> PyList[dict]:
+    """
+    Valide et insère un lot [(index, élément brut)] dans sa propre transaction.
+    Si l’INSERT groupé échoue, le lot est rejoué ligne à ligne sous savepoints pour isoler les fautifs.
+    """
+    results, valid = [], []
+    for index, item in batch:
+        if isinstance(item, json.JSONDecodeError):
+            results.append({"index": index, "status": "invalid", "errors": [{"type": "json_invalid", "msg": str(item)}]})
+            continue
+        try:
+            valid.append((index, doc_values(_doc_adapter.validate_python(item))))
+        except ValidationError as e:
+            results.append({"index": index, "status": "invalid", "errors": e.errors(include_url=False)})
+
+    created = {}
+    if valid:
+        try:
+            with db.begin_nested():
+                created = _insert_docs(db, [row for _, row in valid])
+            outcome = {row["uuid"]: None for _, row in valid}
+        except SQLAlchemyError:
+            outcome = {}
+            for _, row in valid:
+                try:
+                    with db.begin_nested():
+                        created.update(_insert_docs(db, [row]))
+                    outcome[row["uuid"]] = None
+                except SQLAlchemyError as e:
+                    outcome[row["uuid"]] = str(e.orig if getattr(e, "orig", None) else e)
+
+        apply_deltas(db.connection(), Counter(doc_type_id for _, doc_type_id in created.values()))
+        db.commit()
+
+        for index, row in valid:
+            if outcome.get(row["uuid"]):
+                results.append({"index": index, "uuid": row["uuid"], "status": "failed", "error": outcome[row["uuid"]]})
+            elif row["uuid"] in created:
+                results.append({"index": index, "uuid": row["uuid"], "status": "created", "id": created.pop(row["uuid"])[0]})
+            else:
+                results.append({"index": index, "uuid": row["uuid"], "status": "exists"})
+    return sorted(results, key=lambda r: r["index"])
+
+async def _bulk_items(request: Request):
+    """
+    Éléments d’un corps NDJSON (lu en flux) ou d’un tableau JSON. Une ligne NDJSON
+    illisible est transmise comme JSONDecodeError : elle devient un résultat ``invalid``
+    sans interrompre l’ingestion (les lots précédents sont déjà validés en base).
+    """
+    def parse(line: bytes):
+        try:
+            return json.loads(line)
+        except json.JSONDecodeError as e:
+            return e
+
+    if "ndjson" in request.headers.get("content-type", ""):
+        buffer = b""
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    yield parse(line)
+        if buffer.strip():
+            yield parse(buffer)
+        return
+    # Tableau JSON : analysé en entier avant tout lot, une erreur n’a donc rien validé en base.
+    items = json.loads(await request.body())
+    if not isinstance(items, list):
+        raise HTTPException(status_code=400, detail="Tableau JSON ou NDJSON attendu")
+    for item in items:
+        yield item
+
 # 🧠 ROUTES cockpit
 
 ## 🔧 Système
@@ -72,33 +337,82 @@ def list_doc_types(db: Session = Depends(get_db), auth: None = Depends(verify_to
 
 @api_app.get("/docs/", response_model=PyList[OliDoc], tags=["Documents"])
 def list_docs(
+    response: Response,
     db: Session = Depends(get_db),
     auth: None = Depends(verify_token),
     type_id: Optional[int] = Query(None, description="Filtrer par ID de type de document"),
     statut: Optional[str] = Query(None, description="Filtrer par statut du document"),
     created_after: Optional[datetime] = Query(None, description="Documents créés après cette date (ISO)"),
-    created_before: Optional[datetime] = Query(None, description="Documents créés avant cette date (ISO)")
+    created_before: Optional[datetime] = Query(None, description="Documents créés avant cette date (ISO)"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Taille de page"),
+    cursor: Optional[str] = Query(None, description="Curseur opaque renvoyé dans l’en-tête X-Next-Cursor"),
+    fields: Optional[str] = Query(None, description="Champs à renvoyer, séparés par des virgules"),
 ):
-    query = db.query(OliDocORM).options(
-        joinedload(OliDocORM.doc_type_rel),
-        joinedload(OliDocORM.metadata_rel).joinedload(OliDocMetadataORM.metadata_type_rel)
-    )
+    """
+    Liste paginée par curseur (keyset sur created_at, id), sans COUNT : la page suivante
+    existe si l’en-tête ``X-Next-Cursor`` est présent.
+    """
+    requested = parse_fields(fields)
+    columns = set(sa_inspect(OliDocORM).columns.keys())
+    # Projection limitée à des colonnes : ni jointure ni dataclass.
+    flat = requested is not None and set(requested) <= columns
 
-    filters = []
-    if type_id:
-        filters.append(OliDocORM.doc_type_id == type_id)
-    if statut:
-        filters.append(OliDocORM.statut == statut)
-    if created_after:
-        filters.append(OliDocORM.created_at >= created_after)
-    if created_before:
-        filters.append(OliDocORM.created_at <= created_before)
+    query = db.query(OliDocORM)
+    if flat:
+        query = query.options(load_only(*(getattr(OliDocORM, f) for f in {*requested, "id", "created_at"})))
+    elif requested is None or "metadata" in requested:
+        query = query.options(
+            joinedload(OliDocORM.doc_type_rel),
+            # selectinload : la collection ne multiplie pas les lignes soumises au LIMIT.
+            selectinload(OliDocORM.metadata_rel).joinedload(OliDocMetadataORM.metadata_type_rel)
+        )
+    else:
+        # Métadonnées non demandées : ni requête ni chargement paresseux dans to_dataclass().
+        query = query.options(joinedload(OliDocORM.doc_type_rel), noload(OliDocORM.metadata_rel))
 
+    filters = doc_filters(type_id, statut, created_after, created_before)
+    if cursor:
+        filters.append(after_cursor(*decode_cursor(cursor)))
     if filters:
         query = query.filter(and_(*filters))
 
-    docs = query.all()
-    return [d.to_dataclass() for d in docs]
+    docs = query.order_by(OliDocORM.created_at.asc().nulls_last(), OliDocORM.id).limit(limit + 1).all()
+    headers = {}
+    if len(docs) > limit:
+        docs = docs[:limit]
+        headers["X-Next-Cursor"] = encode_cursor(docs[-1])
+
+    if requested is None:
+        response.headers.update(headers)
+        return [d.to_dataclass() for d in docs]
+    if flat:
+        rows = [{f: getattr(d, f) for f in requested} for d in docs]
+    else:
+        rows = [{f: getattr(dc, f) for f in requested} for dc in (d.to_dataclass() for d in docs)]
+    return JSONResponse(jsonable_encoder(rows), headers=headers)
+
+@api_app.get("/docs/export", tags=["Documents"])
+def export_docs(
+    auth: None = Depends(verify_token),
+    type_id: Optional[int] = Query(None, description="Filtrer par ID de type de document"),
+    statut: Optional[str] = Query(None, description="Filtrer par statut du document"),
+    created_after: Optional[datetime] = Query(None, description="Documents créés après cette date (ISO)"),
+    created_before: Optional[datetime] = Query(None, description="Documents créés avant cette date (ISO)"),
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$", description="ndjson ou csv"),
+    gzip: bool = Query(False, description="Télécharger un fichier compressé .gz (application/gzip)"),
+):
+    filters = doc_filters(type_id, statut, created_after, created_before)
+
+    def make_query(db: Session):
+        query = db.query(OliDocORM).options(
+            joinedload(OliDocORM.doc_type_rel),
+            selectinload(OliDocORM.metadata_rel).joinedload(OliDocMetadataORM.metadata_type_rel)
+        )
+        if filters:
+            query = query.filter(and_(*filters))
+        return query.order_by(OliDocORM.created_at, OliDocORM.id)
+
+    return stream_export(make_query, format, gzip, "documents")
 
 @api_app.get("/docs/{uuid_str}", response_model=OliDoc, tags=["Documents"])
 def get_doc(uuid_str: str, db: Session = Depends(get_db), auth: None = Depends(verify_token)):
@@ -117,28 +431,65 @@ def get_doc(uuid_str: str, db: Session = Depends(get_db), auth: None = Depends(v
 
 @api_app.post("/docs/", response_model=OliDoc, status_code=status.HTTP_201_CREATED, tags=["Documents"])
 def create_doc(payload: IngestPayload, db: Session = Depends(get_db), auth: None = Depends(verify_token)):
-    doc_data = payload.document
-    doc = OliDocORM(
-        uuid=doc_data.uuid or str(uuid.uuid4()),
-        nom=doc_data.nom,
-        description=doc_data.description,
-        chemin_fichier=doc_data.chemin_fichier,
-        statut="importé",
-        created_at=doc_data.created_at,
-        updated_at=doc_data.updated_at
-    )
+    doc = OliDocORM(**doc_values(payload.document))
     db.add(doc)
     db.commit()
     db.refresh(doc)
     return doc.to_dataclass()
 
+@api_app.post("/docs/bulk", tags=["Documents"])
+async def bulk_create_docs(
+    request: Request,
+    db: Session = Depends(get_db),
+    auth: None = Depends(verify_token),
+    batch_size: int = Query(DEFAULT_BULK_BATCH_SIZE, ge=1, le=MAX_BULK_BATCH_SIZE, description="Documents par INSERT"),
+):
+    """
+    Ingestion en masse (tableau JSON, ou NDJSON avec ``Content-Type: application/x-ndjson``).
+    Chaque lot est validé puis inséré dans sa transaction ; un document invalide ou en échec
+    n’interrompt pas les autres. Idempotent : un uuid déjà présent est signalé ``exists``.
+    """
+    results, batch = [], []
+    try:
+        index = 0
+        async for item in _bulk_items(request):
+            batch.append((index, item))
+            index += 1
+            if len(batch) >= batch_size:
+                results.extend(await run_in_threadpool(_ingest_batch, db, batch))
+                batch = []
+        if batch:
+            results.extend(await run_in_threadpool(_ingest_batch, db, batch))
+    except json.JSONDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"Tableau JSON invalide : {e}")
+
+    summary = Counter(r["status"] for r in results)
+    return {
+        "total": len(results),
+        "created": summary["created"],
+        "exists": summary["exists"],
+        "invalid": summary["invalid"],
+        "failed": summary["failed"],
+        "results": results,
+    }
+
 ## 📊 Statistiques
+@api_app.on_event("startup")
+def init_stats():
+    # Crée et amorce oli_doc_type_stats avant la première écriture de document.
+    db_gen = get_db()
+    try:
+        install_stats(next(db_gen))
+    finally:
+        db_gen.close()
+
 @api_app.get("/stats", response_model=PyList[DocStat], tags=["Stats"])
 def get_stats(db: Session = Depends(get_db), auth: None = Depends(verify_token)):
-    rows = db.query(OliDocTypeORM.nom, func.count(OliDocORM.id)) \
-        .join(OliDocORM, OliDocORM.doc_type_id == OliDocTypeORM.id) \
-        .group_by(OliDocTypeORM.nom).all()
-    return [{"type": nom, "nb_documents": count} for nom, count in rows]
+    return read_stats(db)
+
+@api_app.post("/stats/reconcile", tags=["Stats"])
+def reconcile_stats(db: Session = Depends(get_db), auth: None = Depends(verify_token)):
+    return {"corrected": reconcile(db), "timestamp": datetime.utcnow().isoformat()}
 
 ## 🧬 Métadonnées
 @api_app.get("/meta-types/", response_model=PyList[OliMetaType], tags=["Metadata"])
@@ -152,3 +503,26 @@ def list_metadata(db: Session = Depends(get_db), auth: None = Depends(verify_tok
         joinedload(OliDocMetadataORM.metadata_type_rel)
     ).all()
     return [m.to_dataclass() for m in data]
+
+@api_app.get("/metadata/export", tags=["Metadata"])
+def export_metadata(
+    auth: None = Depends(verify_token),
+    type_id: Optional[int] = Query(None, description="Filtrer par ID de type du document"),
+    statut: Optional[str] = Query(None, description="Filtrer par statut du document"),
+    created_after: Optional[datetime] = Query(None, description="Documents créés après cette date (ISO)"),
+    created_before: Optional[datetime] = Query(None, description="Documents créés avant cette date (ISO)"),
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$", description="ndjson ou csv"),
+    gzip: bool = Query(False, description="Télécharger un fichier compressé .gz (application/gzip)"),
+):
+    filters = doc_filters(type_id, statut, created_after, created_before)
+
+    def make_query(db: Session):
+        query = db.query(OliDocMetadataORM).options(
+            joinedload(OliDocMetadataORM.document_rel),
+            joinedload(OliDocMetadataORM.metadata_type_rel)
+        )
+        if filters:
+            query = query.join(OliDocMetadataORM.document_rel).filter(and_(*filters))
+        return query.order_by(OliDocMetadataORM.id)
+
+    return stream_export(make_query, format, gzip, "metadata")
@@ -0,0 +1,6 @@
+from django.apps import AppConfig
+
+class CacheConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "backend.cache"
+    verbose_name = "Cache base de données"
@@ -1,16 +1,49 @@
+import asyncio
 import base64
+import functools
+import hashlib
+import os
 import pickle
 import logging
+import threading
+import time
+import weakref
+from contextlib import nullcontext
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple, Union
 
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
 from django.db import DatabaseError, connections, models, router, transaction
 from django.utils.timezone import now as tz_now
 
+try:
+    import asyncpg
+except ImportError:  # dépendance optionnelle (extra "db-async")
+    asyncpg = None
+
+from monitoring.cache_metrics import (
+    CACHE_BYTES_READ, CACHE_BYTES_WRITTEN, CACHE_CULLED_ROWS, CACHE_EXPIRED_ON_READ,
+    CACHE_HITS, CACHE_MISSES, timed,
+)
+
+from .serializers import get_codec
+from .stampede import KeyedLocks, should_refresh_early, unwrap, wrap
+
 logger = logging.getLogger(__name__)
 
+# Moteurs supportant un UPSERT natif (INSERT ... ON CONFLICT) en une seule requête.
+UPSERT_VENDORS = frozenset({"postgresql", "sqlite"})
+
+# Nombre de clés par requête multi-lignes (set_many / delete_many).
+DEFAULT_BATCH_SIZE = 500
+
+
+def _chunks(items: List[Any], size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
 
 class Options:
     """
@@ -35,6 +68,37 @@ class BaseDatabaseCache(BaseCache):
         super().__init__(params)
         self._table = table
 
+        options = params.get("OPTIONS", {})
+        # Libellé "alias" des métriques (Django ne transmet pas l’alias au backend).
+        self._alias = options.get("ALIAS", table)
+        self._use_upsert = options.get("UPSERT", True)
+        self._batch_size = max(1, int(options.get("BATCH_SIZE", DEFAULT_BATCH_SIZE)))
+
+        # "base64" : colonne texte historique (pickle + base64).
+        # "binary" : colonne bytea/BLOB, sérialiseur et compression configurables.
+        self._binary = options.get("VALUE_FORMAT", "base64") == "binary"
+        self._codec = get_codec(options, getattr(self, "pickle_protocol", None))
+
+        # Culling : CULL_INTERVAL (secondes, 0 = désactivé) pilote le thread d’arrière-plan.
+        self._cull_interval = float(options.get("CULL_INTERVAL", 0))
+        self._cull_batch_size = max(1, int(options.get("CULL_BATCH_SIZE", self._batch_size)))
+        self._culler: Optional[threading.Thread] = None
+        self._culler_lock = threading.Lock()
+
+        # Anti-stampede (get_or_set) : XFETCH_BETA = 0 désactive le rafraîchissement anticipé.
+        self._xfetch_beta = float(options.get("XFETCH_BETA", 1.0))
+        self._stampede_lock_timeout = float(options.get("STAMPEDE_LOCK_TIMEOUT", 30))
+        self._stampede_poll_interval = float(options.get("STAMPEDE_POLL_INTERVAL", 0.05))
+        self._flights = KeyedLocks()
+
+        # Async natif : pools asyncpg par boucle d’événements et par base (PostgreSQL uniquement).
+        self._async_native = options.get("ASYNC_NATIVE", True)
+        self._apool_min = int(options.get("ASYNC_POOL_MIN_SIZE", 1))
+        self._apool_max = int(options.get("ASYNC_POOL_MAX_SIZE", 10))
+        self._apools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Task]]" = (
+            weakref.WeakKeyDictionary()
+        )
+
         class CacheEntry:
             _meta = Options(table)
 
@@ -58,18 +122,25 @@ class DatabaseCache(BaseDatabaseCache):
         key_map = {
             self.make_and_validate_key(key, version=version): key for key in keys
         }
+        return {key_map[key]: value for key, (value, _) in self._fetch_many(list(key_map)).items()}
 
+    def _fetch_many(self, db_keys: List[str], raw: bool = False) -> Dict[str, Tuple[Any, datetime]]:
+        """
+        Lit les entrées non expirées : {clé interne: (valeur, expiration)}.
+        Les entrées expirées sont ignorées ; leur suppression relève de cull(), hors chemin de lecture.
+        Avec ``raw``, les valeurs écrites par get_or_set restent enveloppées (voir stampede.wrap).
+        """
         db = router.db_for_read(self.cache_model_class)
         connection = connections[db]
         quote_name = connection.ops.quote_name
         table = quote_name(self._table)
 
         try:
-            with connection.cursor() as cursor:
+            with timed(self._alias, "get_many"), connection.cursor() as cursor:
                 cursor.execute(
                     f"SELECT {quote_name('cache_key')}, {quote_name('value')}, {quote_name('expires')} "
-                    f"FROM {table} WHERE {quote_name('cache_key')} IN ({', '.join(['%s'] * len(key_map))})",
-                    list(key_map),
+                    f"FROM {table} WHERE {quote_name('cache_key')} IN ({', '.join(['%s'] * len(db_keys))})",
+                    db_keys,
                 )
                 rows = cursor.fetchall()
         except DatabaseError as e:
@@ -77,23 +148,96 @@ class DatabaseCache(BaseDatabaseCache):
             return {}
 
         result = {}
-        expired_keys = []
+        now = tz_now()
         expression = models.Expression(output_field=models.DateTimeField())
         converters = connection.ops.get_db_converters(expression) + expression.get_db_converters(connection)
 
+        expired = bytes_read = 0
         for key, value, expires in rows:
             for converter in converters:
                 expires = converter(expires, expression, connection)
-            if expires < tz_now():
-                expired_keys.append(key)
+            if expires >= now:
+                bytes_read += len(value)
+                value = self._decode(connection, value)
+                result[key] = (value if raw else unwrap(value)[0], expires)
             else:
-                value = connection.ops.process_clob(value)
-                value = pickle.loads(base64.b64decode(value.encode()))
-                result[key_map.get(key)] = value
+                expired += 1
 
-        self._base_delete_many(expired_keys)
+        CACHE_HITS.labels(self._alias).inc(len(result))
+        CACHE_MISSES.labels(self._alias).inc(len(db_keys) - len(result))
+        CACHE_EXPIRED_ON_READ.labels(self._alias).inc(expired)
+        CACHE_BYTES_READ.labels(self._alias).inc(bytes_read)
         return result
 
+    def get_or_set(self, key: str, default: Any, timeout: int = DEFAULT_TIMEOUT, version: Optional[int] = None) -> Any:
+        """
+        get_or_set protégé contre les stampedes :
+
+        - dans le processus, les threads en échec sur une même clé partagent un seul calcul ;
+        - entre processus, une ligne sentinelle posée par ``add`` désigne l’unique worker
+          qui recalcule, les autres attendent la nouvelle valeur (ou servent l’ancienne) ;
+        - les clés chaudes sont recalculées avant expiration selon XFetch (OPTIONS['XFETCH_BETA']).
+        """
+        db_key = self.make_and_validate_key(key, version)
+        entry = self._fetch_many([db_key], raw=True).get(db_key)
+        if entry is not None:
+            value, delta = unwrap(entry[0])
+            if not should_refresh_early(entry[1], delta, self._xfetch_beta, tz_now()):
+                return value
+
+        with self._flights.hold(db_key):
+            # Un autre thread du processus a pu recalculer pendant l’attente du verrou.
+            current = self._fetch_many([db_key], raw=True).get(db_key)
+            if current is not None and (entry is None or current[1] != entry[1]):
+                return unwrap(current[0])[0]
+            return self._compute_once(db_key, default, timeout, stale=entry)
+
+    def single_flight(self, timeout: int = DEFAULT_TIMEOUT, key_prefix: Optional[str] = None, version: Optional[int] = None):
+        """
+        Décorateur mettant en cache le résultat d’une fonction via get_or_set.
+        La clé combine ``key_prefix`` (par défaut le nom qualifié) et un condensé des arguments.
+        """
+        def decorator(func):
+            prefix = key_prefix or f"{func.__module__}.{func.__qualname__}"
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                digest = hashlib.sha1(repr((args, sorted(kwargs.items()))).encode()).hexdigest()
+                return self.get_or_set(f"{prefix}:{digest}", lambda: func(*args, **kwargs), timeout, version)
+
+            return wrapper
+        return decorator
+
+    def _compute_once(self, db_key: str, default: Any, timeout: int, stale: Optional[Tuple[Any, datetime]]) -> Any:
+        # Les sentinelles passent par DatabaseCache directement : un backend dérivé
+        # (ex. TieredDatabaseCache) n’a pas à les traiter comme des écritures métier.
+        lock_key = f"{db_key}:lock"
+        deadline = time.monotonic() + self._stampede_lock_timeout
+        while True:
+            if DatabaseCache._base_set(self, "add", lock_key, os.getpid(), self._stampede_lock_timeout):
+                try:
+                    return self._compute_and_store(db_key, default, timeout)
+                finally:
+                    DatabaseCache._base_delete_many(self, [lock_key])
+
+            # Un autre worker recalcule : la valeur encore valide reste servie entre-temps.
+            if stale is not None:
+                return unwrap(stale[0])[0]
+            if time.monotonic() >= deadline:
+                logger.warning(f"Verrou de recalcul expiré pour {db_key}, calcul local")
+                return self._compute_and_store(db_key, default, timeout)
+
+            time.sleep(self._stampede_poll_interval)
+            current = self._fetch_many([db_key]).get(db_key)
+            if current is not None:
+                return current[0]
+
+    def _compute_and_store(self, db_key: str, default: Any, timeout: int) -> Any:
+        start = time.perf_counter()
+        value = default() if callable(default) else default
+        self._base_set("set", db_key, wrap(value, time.perf_counter() - start), timeout)
+        return value
+
     def set(self, key: str, value: Any, timeout: int = DEFAULT_TIMEOUT, version: Optional[int] = None) -> bool:
         return self._base_set("set", self.make_and_validate_key(key, version), value, timeout)
 
@@ -103,19 +247,121 @@ class DatabaseCache(BaseDatabaseCache):
     def touch(self, key: str, timeout: int = DEFAULT_TIMEOUT, version: Optional[int] = None) -> bool:
         return self._base_set("touch", self.make_and_validate_key(key, version), None, timeout)
 
-    def _base_set(self, mode: str, key: str, value: Optional[Any], timeout: int = DEFAULT_TIMEOUT) -> bool:
-        timeout = self.get_backend_timeout(timeout)
+    def set_many(self, data: Dict[str, Any], timeout: int = DEFAULT_TIMEOUT, version: Optional[int] = None) -> List[str]:
+        """
+        Écrit plusieurs clés en requêtes multi-lignes, par lots, dans une seule transaction.
+        Retourne la liste des clés non écrites (convention Django).
+        """
+        if not data:
+            return []
+
+        self._ensure_culler()
+        key_map = {self.make_and_validate_key(key, version): key for key in data}
+        exp = self._expiry_for(self.get_backend_timeout(timeout))
+        rows = [(db_key, self._encode(data[key]), exp) for db_key, key in key_map.items()]
+
+        try:
+            with timed(self._alias, "set_many"):
+                self._write_rows(rows)
+        except DatabaseError as e:
+            logger.warning(f"Database error during set_many: {e}")
+            return list(data)
+        CACHE_BYTES_WRITTEN.labels(self._alias).inc(sum(len(value) for _, value, _ in rows))
+        return []
+
+    def _write_rows(self, rows: List[Tuple[str, Union[str, bytes], datetime]]) -> None:
+        """
+        Écrit des lignes (clé interne, valeur encodée, expiration) en requêtes multi-lignes,
+        par lots, dans une seule transaction (inutile pour un UPSERT en une requête). Lève DatabaseError.
+        """
         db = router.db_for_write(self.cache_model_class)
         connection = connections[db]
         quote_name = connection.ops.quote_name
         table = quote_name(self._table)
+        key_col, value_col, expires_col = (quote_name(c) for c in ("cache_key", "value", "expires"))
+        upsert = self._supports_upsert(connection)
+        batches = list(_chunks(rows, self._batch_size_for(connection, 3)))
+        atomic = nullcontext() if upsert and len(batches) == 1 else transaction.atomic(using=db)
+
+        with atomic, connection.cursor() as cursor:
+            for batch in batches:
+                if not upsert:
+                    keys = [db_key for db_key, _, _ in batch]
+                    cursor.execute(
+                        f"DELETE FROM {table} WHERE {key_col} IN ({', '.join(['%s'] * len(keys))})",
+                        keys,
+                    )
+                sql = (
+                    f"INSERT INTO {table} ({key_col}, {value_col}, {expires_col}) VALUES "
+                    + ", ".join(["(%s, %s, %s)"] * len(batch))
+                )
+                if upsert:
+                    sql += (
+                        f" ON CONFLICT ({key_col}) DO UPDATE SET "
+                        f"{value_col} = EXCLUDED.{value_col}, {expires_col} = EXCLUDED.{expires_col}"
+                    )
+                params = []
+                for db_key, value, exp in batch:
+                    params.extend((db_key, value, connection.ops.adapt_datetimefield_value(exp)))
+                cursor.execute(sql, params)
 
-        now = tz_now().replace(microsecond=0)
+    def _batch_size_for(self, connection, params_per_row: int) -> int:
+        """
+        Taille de lot bornée par la limite de paramètres du moteur (ex. 999 sur SQLite ancien).
+        """
+        max_params = connection.features.max_query_params
+        if max_params is None:
+            return self._batch_size
+        return max(1, min(self._batch_size, max_params // params_per_row))
+
+    def _expiry_for(self, timeout: Optional[float]) -> datetime:
         exp = datetime.max if timeout is None else datetime.fromtimestamp(timeout, timezone.utc if settings.USE_TZ else None)
-        exp = exp.replace(microsecond=0)
+        return exp.replace(microsecond=0)
 
+    def _encode(self, value: Optional[Any]) -> Union[str, bytes]:
+        if self._binary:
+            return self._codec.encode(value)
+        return self._encode_legacy(value)
+
+    def _decode(self, connection, value: Union[str, bytes, memoryview]) -> Any:
+        if self._binary:
+            return self._codec.decode(bytes(value))
+        return self._decode_legacy(connection.ops.process_clob(value))
+
+    def _encode_legacy(self, value: Optional[Any]) -> str:
         pickled = pickle.dumps(value, self.pickle_protocol) if value is not None else b""
-        b64encoded = base64.b64encode(pickled).decode("latin1")
+        return base64.b64encode(pickled).decode("latin1")
+
+    @staticmethod
+    def _decode_legacy(value: str) -> Any:
+        return pickle.loads(base64.b64decode(value.encode()))
+
+    def _base_set(self, mode: str, key: str, value: Optional[Any], timeout: int = DEFAULT_TIMEOUT) -> bool:
+        self._ensure_culler()
+        timeout = self.get_backend_timeout(timeout)
+        db = router.db_for_write(self.cache_model_class)
+        connection = connections[db]
+
+        now = tz_now().replace(microsecond=0)
+        exp = self._expiry_for(timeout)
+        encoded = self._encode(value)
+
+        with timed(self._alias, mode):
+            if self._supports_upsert(connection):
+                written = self._upsert(connection, mode, key, encoded, exp, now)
+            else:
+                written = self._select_then_write(connection, mode, key, encoded, exp, now)
+
+        if written and mode != "touch":
+            CACHE_BYTES_WRITTEN.labels(self._alias).inc(len(encoded))
+        return written
+
+    def _select_then_write(self, connection, mode: str, key: str, encoded: Union[str, bytes], exp: datetime, now: datetime) -> bool:
+        """
+        Chemin d’écriture générique (SELECT puis UPDATE ou INSERT) pour les moteurs sans UPSERT natif.
+        """
+        quote_name = connection.ops.quote_name
+        table = quote_name(self._table)
 
         try:
             with connection.cursor() as cursor:
@@ -136,12 +382,12 @@ class DatabaseCache(BaseDatabaseCache):
                 elif result and (mode == "set" or (mode == "add" and current_expires < now)):
                     cursor.execute(
                         f"UPDATE {table} SET {quote_name('value')} = %s, {quote_name('expires')} = %s WHERE {quote_name('cache_key')} = %s",
-                        [b64encoded, exp, key],
+                        [encoded, exp, key],
                     )
                 elif mode != "touch":
                     cursor.execute(
                         f"INSERT INTO {table} ({quote_name('cache_key')}, {quote_name('value')}, {quote_name('expires')}) VALUES (%s, %s, %s)",
-                        [key, b64encoded, exp],
+                        [key, encoded, exp],
                     )
                 else:
                     return False
@@ -150,6 +396,55 @@ class DatabaseCache(BaseDatabaseCache):
             return False
         return True
 
+    def _supports_upsert(self, connection) -> bool:
+        return self._use_upsert and connection.vendor in UPSERT_VENDORS
+
+    def _upsert_sql(self, connection, mode: str) -> str:
+        """
+        Construit la requête d’écriture unique correspondant au mode demandé.
+
+        - ``set`` : insère ou écrase inconditionnellement.
+        - ``add`` : insère, ou écrase uniquement si l’entrée existante a expiré.
+        - ``touch`` : prolonge l’expiration d’une entrée existante.
+        """
+        quote_name = connection.ops.quote_name
+        table = quote_name(self._table)
+        key_col, value_col, expires_col = (quote_name(c) for c in ("cache_key", "value", "expires"))
+
+        if mode == "touch":
+            return f"UPDATE {table} SET {expires_col} = %s WHERE {key_col} = %s"
+
+        sql = (
+            f"INSERT INTO {table} ({key_col}, {value_col}, {expires_col}) VALUES (%s, %s, %s) "
+            f"ON CONFLICT ({key_col}) DO UPDATE SET "
+            f"{value_col} = EXCLUDED.{value_col}, {expires_col} = EXCLUDED.{expires_col}"
+        )
+        if mode == "add":
+            sql += f" WHERE {table}.{expires_col} < %s"
+        return sql
+
+    def _upsert(self, connection, mode: str, key: str, value: str, exp: datetime, now: datetime) -> bool:
+        """
+        Écriture en un seul aller-retour via l’UPSERT natif du moteur.
+        Le nombre de lignes affectées indique si l’écriture a eu lieu.
+        """
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(self._upsert_sql(connection, mode), self._upsert_params(connection, mode, key, value, exp, now))
+                return mode == "set" or cursor.rowcount > 0
+        except DatabaseError as e:
+            logger.warning(f"Database error during {mode}: {e}")
+            return False
+
+    @staticmethod
+    def _upsert_params(connection, mode: str, key: str, value: Union[str, bytes], exp: datetime, now: datetime) -> List[Any]:
+        exp = connection.ops.adapt_datetimefield_value(exp)
+        if mode == "touch":
+            return [exp, key]
+        if mode == "add":
+            return [key, value, exp, connection.ops.adapt_datetimefield_value(now)]
+        return [key, value, exp]
+
     def delete(self, key: str, version: Optional[int] = None) -> bool:
         return self._base_delete_many([self.make_and_validate_key(key, version)])
 
@@ -166,13 +461,16 @@ class DatabaseCache(BaseDatabaseCache):
         quote_name = connection.ops.quote_name
         table = quote_name(self._table)
 
+        deleted = 0
         try:
-            with connection.cursor() as cursor:
-                cursor.execute(
-                    f"DELETE FROM {table} WHERE {quote_name('cache_key')} IN ({', '.join(['%s'] * len(keys))})",
-                    keys,
-                )
-                return bool(cursor.rowcount)
+            with timed(self._alias, "delete_many"), transaction.atomic(using=db), connection.cursor() as cursor:
+                for batch in _chunks(list(keys), self._batch_size_for(connection, 1)):
+                    cursor.execute(
+                        f"DELETE FROM {table} WHERE {quote_name('cache_key')} IN ({', '.join(['%s'] * len(batch))})",
+                        batch,
+                    )
+                    deleted += cursor.rowcount
+                return bool(deleted)
         except DatabaseError as e:
             logger.warning(f"Database error during delete_many: {e}")
             return False
@@ -185,7 +483,7 @@ class DatabaseCache(BaseDatabaseCache):
         now = tz_now().replace(microsecond=0, tzinfo=None)
 
         try:
-            with connection.cursor() as cursor:
+            with timed(self._alias, "has_key"), connection.cursor() as cursor:
                 cursor.execute(
                     f"SELECT {quote_name('cache_key')} FROM {quote_name(self._table)} "
                     f"WHERE {quote_name('cache_key')} = %s AND {quote_name('expires')} > %s",
@@ -196,29 +494,276 @@ class DatabaseCache(BaseDatabaseCache):
             logger.warning(f"Database error during has_key: {e}")
             return False
 
-    def _cull(self, db: str, cursor, now: datetime, num: int) -> None:
+    def cull(self, batch_size: Optional[int] = None) -> int:
+        """
+        Supprime par lots les entrées expirées, puis applique MAX_ENTRIES / CULL_FREQUENCY.
+        Retourne le nombre de lignes supprimées.
+        """
+        db = router.db_for_write(self.cache_model_class)
+        connection = connections[db]
+        now = tz_now().replace(microsecond=0)
+
+        try:
+            with timed(self._alias, "cull"):
+                deleted = self._delete_expired(connection, now, batch_size or self._cull_batch_size)
+                with connection.cursor() as cursor:
+                    cursor.execute(f"SELECT COUNT(*) FROM {connection.ops.quote_name(self._table)}")
+                    num = cursor.fetchone()[0]
+                    deleted += self._cull(db, cursor, now, num)
+        except DatabaseError as e:
+            logger.warning(f"Database error during cull: {e}")
+            return 0
+
+        CACHE_CULLED_ROWS.labels(self._alias).inc(deleted)
+
+        logger.debug(f"Cache {self._table}: {deleted} entrées supprimées par cull")
+        return deleted
+
+    def _delete_expired(self, connection, now: datetime, batch_size: int) -> int:
+        """
+        Supprime les entrées expirées par lots courts (une transaction par lot)
+        pour ne pas verrouiller la table sur de longues durées.
+        """
+        quote_name = connection.ops.quote_name
+        table = quote_name(self._table)
+        key_col, expires_col = quote_name("cache_key"), quote_name("expires")
+        now = connection.ops.adapt_datetimefield_value(now)
+        batch_size = min(batch_size, self._batch_size_for(connection, 1))
+
+        deleted = 0
+        while True:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"SELECT {key_col} FROM {table} WHERE {expires_col} < %s ORDER BY {expires_col} LIMIT %s",
+                    [now, batch_size],
+                )
+                keys = [row[0] for row in cursor.fetchall()]
+                if not keys:
+                    return deleted
+                cursor.execute(
+                    f"DELETE FROM {table} WHERE {key_col} IN ({', '.join(['%s'] * len(keys))}) AND {expires_col} < %s",
+                    keys + [now],
+                )
+                deleted += max(cursor.rowcount, 0)
+            if len(keys) < batch_size:
+                return deleted
+
+    def _cull(self, db: str, cursor, now: datetime, num: int) -> int:
+        """
+        Applique MAX_ENTRIES : au-delà, supprime 1/CULL_FREQUENCY des entrées
+        (toutes si CULL_FREQUENCY vaut 0).
+        """
+        if num <= self._max_entries:
+            return 0
+
         connection = connections[db]
         table = connection.ops.quote_name(self._table)
 
+        if self._cull_frequency == 0:
+            self.clear()
+            return num
+
+        cull_num = num // self._cull_frequency
+        cursor.execute(connection.ops.cache_key_culling_sql() % table, [cull_num])
+        last_cache_key = cursor.fetchone()
+        if not last_cache_key:
+            return 0
         cursor.execute(
-            f"DELETE FROM {table} WHERE {connection.ops.quote_name('expires')} < %s",
-            [connection.ops.adapt_datetimefield_value(now)],
+            f"DELETE FROM {table} WHERE {connection.ops.quote_name('cache_key')} < %s",
+            [last_cache_key[0]],
         )
-        deleted_count = cursor.rowcount
-        remaining_num = num - deleted_count
+        return max(cursor.rowcount, 0)
 
-        if self._cull_frequency == 0:
-            self.clear()
-        elif remaining_num > self._max_entries:
-            cull_num = remaining_num // self._cull_frequency
-            cursor.execute(connection.ops.cache_key_culling_sql() % table, [cull_num])
-            last_cache_key = cursor.fetchone()
-            if last_cache_key:
-                cursor.execute(
-                    f"DELETE FROM {table} WHERE                     cursor.execute(
-                        f"DELETE FROM {table} WHERE {connection.ops.quote_name('cache_key')} < %s",
-                        [last_cache_key[0]],
-                    )
+    def ensure_expiry_index(self) -> bool:
+        """
+        Crée l’index sur la colonne ``expires`` s’il n’existe pas encore.
+        Retourne True si l’index a été créé.
+        """
+        db = router.db_for_write(self.cache_model_class)
+        connection = connections[db]
+        quote_name = connection.ops.quote_name
+
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, self._table)
+            if any(c["index"] and c["columns"] == ["expires"] for c in constraints.values()):
+                return False
+            cursor.execute(
+                f"CREATE INDEX {quote_name(self._table + '_expires_idx')} "
+                f"ON {quote_name(self._table)} ({quote_name('expires')})"
+            )
+        return True
+
+    def _ensure_culler(self) -> None:
+        """
+        Démarre (une fois par processus) le thread de culling périodique si CULL_INTERVAL > 0.
+        """
+        if not self._cull_interval or self._culler is not None:
+            return
+        with self._culler_lock:
+            if self._culler is None:
+                self._culler = threading.Thread(
+                    target=self._culler_loop, name=f"cache-cull-{self._table}", daemon=True
+                )
+                self._culler.start()
+
+    def _culler_loop(self) -> None:
+        db = router.db_for_write(self.cache_model_class)
+        while True:
+            time.sleep(self._cull_interval)
+            try:
+                self.cull()
+            except Exception:
+                logger.exception(f"Culling du cache {self._table} en échec")
+            finally:
+                # Le thread ne conserve pas de connexion ouverte entre deux passes.
+                connections[db].close()
+
+    # ⚡ Async natif (asyncpg) : pas de passage par le pool de threads de sync_to_async.
+    # Hors PostgreSQL, sans asyncpg ou avec OPTIONS['ASYNC_NATIVE'] = False,
+    # les implémentations par défaut de BaseCache (sync_to_async) sont conservées.
+
+    def _uses_asyncpg(self, db: str) -> bool:
+        return self._async_native and asyncpg is not None and connections[db].vendor == "postgresql"
+
+    async def _apool(self, db: str):
+        loop = asyncio.get_running_loop()
+        pools = self._apools.setdefault(loop, {})
+        task = pools.get(db)
+        if task is None:
+            settings_dict = connections[db].settings_dict
+            # create_pool retourne un Pool attendable, pas une coroutine : ensure_future et non create_task.
+            task = pools[db] = asyncio.ensure_future(asyncpg.create_pool(
+                database=settings_dict["NAME"],
+                user=settings_dict.get("USER") or None,
+                password=settings_dict.get("PASSWORD") or None,
+                host=settings_dict.get("HOST") or None,
+                port=int(settings_dict["PORT"]) if settings_dict.get("PORT") else None,
+                min_size=self._apool_min,
+                max_size=self._apool_max,
+            ))
+        try:
+            return await task
+        except Exception:
+            pools.pop(db, None)
+            raise
+
+    @staticmethod
+    def _asyncpg_sql(sql: str) -> str:
+        """Convertit les marqueurs %s (DB-API) en $1, $2… (asyncpg)."""
+        parts = sql.split("%s")
+        return "".join(f"{part}${i}" for i, part in enumerate(parts[:-1], start=1)) + parts[-1]
+
+    async def aget(self, key: str, default: Optional[Any] = None, version: Optional[int] = None) -> Any:
+        return (await self.aget_many([key], version)).get(key, default)
+
+    async def aget_many(self, keys: List[str], version: Optional[int] = None) -> Dict[str, Any]:
+        db = router.db_for_read(self.cache_model_class)
+        if not self._uses_asyncpg(db):
+            # Pas super().aget_many : BaseCache la réimplémente via self.aget (récursion).
+            return await sync_to_async(self.get_many)(keys, version)
+        if not keys:
+            return {}
+
+        key_map = {self.make_and_validate_key(key, version=version): key for key in keys}
+        connection = connections[db]
+        quote_name = connection.ops.quote_name
+
+        try:
+            pool = await self._apool(db)
+            with timed(self._alias, "get_many"):
+                rows = await pool.fetch(
+                    f"SELECT {quote_name('cache_key')}, {quote_name('value')} FROM {quote_name(self._table)} "
+                    f"WHERE {quote_name('cache_key')} = ANY($1::text[]) AND {quote_name('expires')} >= now()",
+                    list(key_map),
+                )
+        except (asyncpg.PostgresError, OSError) as e:
+            logger.warning(f"Database error during aget_many: {e}")
+            return {}
+
+        result = {key_map[row[0]]: unwrap(self._decode(connection, row[1]))[0] for row in rows}
+        CACHE_HITS.labels(self._alias).inc(len(result))
+        CACHE_MISSES.labels(self._alias).inc(len(key_map) - len(result))
+        CACHE_BYTES_READ.labels(self._alias).inc(sum(len(row[1]) for row in rows))
+        return result
+
+    async def aset(self, key: str, value: Any, timeout: int = DEFAULT_TIMEOUT, version: Optional[int] = None) -> bool:
+        return await self._abase_set("set", self.make_and_validate_key(key, version), value, timeout)
+
+    async def aadd(self, key: str, value: Any, timeout: int = DEFAULT_TIMEOUT, version: Optional[int] = None) -> bool:
+        return await self._abase_set("add", self.make_and_validate_key(key, version), value, timeout)
+
+    async def _abase_set(self, mode: str, key: str, value: Any, timeout: int = DEFAULT_TIMEOUT) -> bool:
+        db = router.db_for_write(self.cache_model_class)
+        if not self._uses_asyncpg(db):
+            # ``key`` est déjà préfixée/versionnée : pas de repassage par set/add.
+            return await sync_to_async(self._base_set)(mode, key, value, timeout)
+
+        connection = connections[db]
+        encoded = self._encode(value)
+        params = self._upsert_params(
+            connection, mode, key, encoded,
+            self._expiry_for(self.get_backend_timeout(timeout)), tz_now().replace(microsecond=0),
+        )
+
+        try:
+            pool = await self._apool(db)
+            with timed(self._alias, mode):
+                status = await pool.execute(self._asyncpg_sql(self._upsert_sql(connection, mode)), *params)
+        except (asyncpg.PostgresError, OSError) as e:
+            logger.warning(f"Database error during a{mode}: {e}")
+            return False
+
+        # Statut asyncpg de la forme "INSERT 0 1" : le dernier nombre est le nombre de lignes.
+        written = mode == "set" or int(status.split()[-1]) > 0
+        if written:
+            CACHE_BYTES_WRITTEN.labels(self._alias).inc(len(encoded))
+        return written
+
+    async def adelete(self, key: str, version: Optional[int] = None) -> bool:
+        return await self._abase_delete_many([self.make_and_validate_key(key, version)])
+
+    async def adelete_many(self, keys: List[str], version: Optional[int] = None) -> None:
+        await self._abase_delete_many([self.make_and_validate_key(key, version) for key in keys])
+
+    async def _abase_delete_many(self, keys: List[str]) -> bool:
+        if not keys:
+            return False
+        db = router.db_for_write(self.cache_model_class)
+        if not self._uses_asyncpg(db):
+            return await sync_to_async(self._base_delete_many)(keys)
+
+        quote_name = connections[db].ops.quote_name
+        try:
+            pool = await self._apool(db)
+            with timed(self._alias, "delete_many"):
+                status = await pool.execute(
+                    f"DELETE FROM {quote_name(self._table)} WHERE {quote_name('cache_key')} = ANY($1::text[])",
+                    list(keys),
+                )
+        except (asyncpg.PostgresError, OSError) as e:
+            logger.warning(f"Database error during adelete_many: {e}")
+            return False
+        return int(status.split()[-1]) > 0
+
+    async def ahas_key(self, key: str, version: Optional[int] = None) -> bool:
+        db = router.db_for_read(self.cache_model_class)
+        if not self._uses_asyncpg(db):
+            return await sync_to_async(self.has_key)(key, version)
+
+        key = self.make_and_validate_key(key, version)
+        quote_name = connections[db].ops.quote_name
+        try:
+            pool = await self._apool(db)
+            with timed(self._alias, "has_key"):
+                row = await pool.fetchrow(
+                    f"SELECT 1 FROM {quote_name(self._table)} "
+                    f"WHERE {quote_name('cache_key')} = $1 AND {quote_name('expires')} > now()",
+                    key,
+                )
+        except (asyncpg.PostgresError, OSError) as e:
+            logger.warning(f"Database error during ahas_key: {e}")
+            return False
+        return row is not None
 
     def clear(self) -> None:
         """
@@ -229,7 +774,7 @@ class DatabaseCache(BaseDatabaseCache):
         table = connection.ops.quote_name(self._table)
 
         try:
-            with connection.cursor() as cursor:
+            with timed(self._alias, "clear"), connection.cursor() as cursor:
                 cursor.execute(f"DELETE FROM {table}")
         except DatabaseError as e:
             logger.warning(f"Database error during clear: {e}")
@@ -0,0 +1,42 @@
+from django.core import management
+from django.core.cache import caches
+
+from backend.cache.database_cache_backend import DatabaseCache
+
+
+class Command(management.BaseCommand):
+    help = "🧹 Purge par lots les entrées expirées du cache DB et applique MAX_ENTRIES."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--alias",
+            action="append",
+            dest="aliases",
+            help="Alias de cache à traiter (répétable). Par défaut : tous les DatabaseCache.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=None,
+            help="Nombre de lignes expirées supprimées par lot (défaut : OPTIONS['CULL_BATCH_SIZE'])",
+        )
+        parser.add_argument(
+            "--create-index",
+            action="store_true",
+            help="Crée l’index sur la colonne expires s’il est absent",
+        )
+
+    def handle(self, *args, **options):
+        aliases = options["aliases"] or list(caches.settings)
+        for alias in aliases:
+            cache = caches[alias]
+            if not isinstance(cache, DatabaseCache):
+                if options["aliases"]:
+                    self.stderr.write(self.style.WARNING(f"⚠️ Cache '{alias}' ignoré : pas un DatabaseCache."))
+                continue
+
+            if options["create_index"] and cache.ensure_expiry_index():
+                self.stdout.write(f"📇 Index expires créé pour '{alias}'.")
+
+            deleted = cache.cull(batch_size=options["batch_size"])
+            self.stdout.write(self.style.SUCCESS(f"✅ Cache '{alias}' : {deleted} entrées supprimées."))
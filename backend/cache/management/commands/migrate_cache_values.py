@@ -0,0 +1,89 @@
+from django.core import management
+from django.core.cache import caches
+from django.db import connections, router, transaction
+
+from backend.cache.database_cache_backend import DatabaseCache, _chunks
+
+TMP_COLUMN = "value_bin"
+
+
+class Command(management.BaseCommand):
+    help = "🗜️ Convertit la colonne texte base64 du cache DB en colonne binaire (bytea/BLOB)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--alias",
+            default="default",
+            help="Alias du cache (settings.CACHES) configuré avec OPTIONS['VALUE_FORMAT'] = 'binary'",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Nombre de lignes converties par transaction",
+        )
+
+    def handle(self, *args, **options):
+        cache = caches[options["alias"]]
+        if not isinstance(cache, DatabaseCache) or not cache._binary:
+            raise management.CommandError(
+                "❌ Le cache cible doit être un DatabaseCache avec OPTIONS['VALUE_FORMAT'] = 'binary'."
+            )
+
+        db = router.db_for_write(cache.cache_model_class)
+        connection = connections[db]
+        quote_name = connection.ops.quote_name
+        table = quote_name(cache._table)
+        key_col, value_col, tmp_col = (quote_name(c) for c in ("cache_key", "value", TMP_COLUMN))
+
+        with connection.cursor() as cursor:
+            columns = {c.name for c in connection.introspection.get_table_description(cursor, cache._table)}
+        if TMP_COLUMN not in columns:
+            binary_type = connection.data_types["BinaryField"]
+            with connection.cursor() as cursor:
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN {tmp_col} {binary_type} NULL")
+
+        # 🔁 Conversion par lots, reprise possible : seules les lignes non converties sont lues.
+        converted = dropped = 0
+        last_key = ""
+        while True:
+            with transaction.atomic(using=db), connection.cursor() as cursor:
+                cursor.execute(
+                    f"SELECT {key_col}, {value_col} FROM {table} "
+                    f"WHERE {tmp_col} IS NULL AND {key_col} > %s ORDER BY {key_col} LIMIT %s",
+                    [last_key, options["batch_size"]],
+                )
+                rows = cursor.fetchall()
+                if not rows:
+                    break
+                last_key = rows[-1][0]
+
+                updates, invalid = [], []
+                for key, value in rows:
+                    try:
+                        legacy = DatabaseCache._decode_legacy(connection.ops.process_clob(value))
+                        updates.append([cache._codec.encode(legacy), key])
+                    except Exception:
+                        invalid.append(key)
+
+                if updates:
+                    cursor.executemany(f"UPDATE {table} SET {tmp_col} = %s WHERE {key_col} = %s", updates)
+                for batch in _chunks(invalid, cache._batch_size_for(connection, 1)):
+                    cursor.execute(
+                        f"DELETE FROM {table} WHERE {key_col} IN ({', '.join(['%s'] * len(batch))})",
+                        batch,
+                    )
+                converted += len(updates)
+                dropped += len(invalid)
+            self.stdout.write(f"🔄 {converted} entrées converties…")
+
+        # 🔀 Bascule : les entrées écrites entre-temps au format texte sont simplement écartées.
+        with transaction.atomic(using=db), connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {table} WHERE {tmp_col} IS NULL")
+            dropped += max(cursor.rowcount, 0)
+            cursor.execute(f"ALTER TABLE {table} DROP COLUMN {value_col}")
+            cursor.execute(f"ALTER TABLE {table} RENAME COLUMN {tmp_col} TO {value_col}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Migration terminée : {converted} entrées converties, {dropped} écartées."
+        ))
@@ -0,0 +1,184 @@
+import json
+import pickle
+import zlib
+from typing import Any, Dict, Optional
+
+try:
+    import msgpack
+except ImportError:  # dépendance optionnelle
+    msgpack = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:  # dépendance optionnelle
+    lz4_frame = None
+
+try:
+    import zstandard
+except ImportError:  # dépendance optionnelle
+    zstandard = None
+
+# Seuil (octets) au-delà duquel la valeur sérialisée est compressée.
+DEFAULT_COMPRESS_MIN_SIZE = 1024
+
+
+class PickleSerializer:
+    name = "pickle"
+
+    def __init__(self, protocol: int = pickle.HIGHEST_PROTOCOL):
+        self.protocol = protocol
+
+    def dumps(self, value: Any) -> bytes:
+        return pickle.dumps(value, self.protocol)
+
+    def loads(self, data: bytes) -> Any:
+        return pickle.loads(data)
+
+
+class JSONSerializer:
+    name = "json"
+
+    def dumps(self, value: Any) -> bytes:
+        return json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+    def loads(self, data: bytes) -> Any:
+        return json.loads(data.decode("utf-8"))
+
+
+class MsgPackSerializer:
+    name = "msgpack"
+
+    def __init__(self):
+        if msgpack is None:
+            raise ImportError("Le sérialiseur 'msgpack' nécessite le paquet msgpack.")
+
+    def dumps(self, value: Any) -> bytes:
+        return msgpack.packb(value, use_bin_type=True)
+
+    def loads(self, data: bytes) -> Any:
+        return msgpack.unpackb(data, raw=False)
+
+
+class ZlibCompressor:
+    name = "zlib"
+    flag = 1
+
+    def __init__(self, level: int = 6):
+        self.level = level
+
+    def compress(self, data: bytes) -> bytes:
+        return zlib.compress(data, self.level)
+
+    def decompress(self, data: bytes) -> bytes:
+        return zlib.decompress(data)
+
+
+class LZ4Compressor:
+    name = "lz4"
+    flag = 2
+
+    def __init__(self):
+        if lz4_frame is None:
+            raise ImportError("Le compresseur 'lz4' nécessite le paquet lz4.")
+
+    def compress(self, data: bytes) -> bytes:
+        return lz4_frame.compress(data)
+
+    def decompress(self, data: bytes) -> bytes:
+        return lz4_frame.decompress(data)
+
+
+class ZstdCompressor:
+    name = "zstd"
+    flag = 3
+
+    def __init__(self, level: int = 3):
+        if zstandard is None:
+            raise ImportError("Le compresseur 'zstd' nécessite le paquet zstandard.")
+        self.level = level
+
+    def compress(self, data: bytes) -> bytes:
+        return zstandard.ZstdCompressor(level=self.level).compress(data)
+
+    def decompress(self, data: bytes) -> bytes:
+        return zstandard.ZstdDecompressor().decompress(data)
+
+
+SERIALIZERS = {
+    "pickle": PickleSerializer,
+    "json": JSONSerializer,
+    "msgpack": MsgPackSerializer,
+}
+
+COMPRESSORS = {
+    "zlib": ZlibCompressor,
+    "lz4": LZ4Compressor,
+    "zstd": ZstdCompressor,
+}
+
+# Pour la décompression, tous les algorithmes disponibles sont reconnus via l’octet d’en-tête,
+# même si le compresseur configuré a changé depuis l’écriture.
+_FLAG_RAW = 0
+_DECOMPRESSORS = {cls.flag: cls for cls in COMPRESSORS.values()}
+
+
+class ValueCodec:
+    """
+    Encode une valeur de cache en octets : un octet d’en-tête (0 = brut, sinon
+    identifiant du compresseur) suivi de la charge utile sérialisée.
+    """
+
+    def __init__(self, serializer, compressor=None, min_size: int = DEFAULT_COMPRESS_MIN_SIZE):
+        self.serializer = serializer
+        self.compressor = compressor
+        self.min_size = min_size
+        self._decompressors: Dict[int, Any] = {}
+
+    def encode(self, value: Any) -> bytes:
+        payload = self.serializer.dumps(value)
+        if self.compressor is not None and len(payload) >= self.min_size:
+            compressed = self.compressor.compress(payload)
+            if len(compressed) < len(payload):
+                return bytes((self.compressor.flag,)) + compressed
+        return bytes((_FLAG_RAW,)) + payload
+
+    def decode(self, data: bytes) -> Any:
+        flag, payload = data[0], data[1:]
+        if flag != _FLAG_RAW:
+            payload = self._decompressor(flag).decompress(payload)
+        return self.serializer.loads(payload)
+
+    def _decompressor(self, flag: int):
+        if flag not in self._decompressors:
+            if self.compressor is not None and self.compressor.flag == flag:
+                self._decompressors[flag] = self.compressor
+            elif flag in _DECOMPRESSORS:
+                self._decompressors[flag] = _DECOMPRESSORS[flag]()
+            else:
+                raise ValueError(f"Compresseur inconnu (en-tête {flag})")
+        return self._decompressors[flag]
+
+
+def get_codec(options: Dict[str, Any], pickle_protocol: Optional[int] = None) -> ValueCodec:
+    """
+    Construit le codec à partir des OPTIONS du cache :
+    ``SERIALIZER`` (pickle, json, msgpack), ``COMPRESSOR`` (zlib, lz4, zstd ou None)
+    et ``COMPRESS_MIN_SIZE``.
+    """
+    serializer_name = options.get("SERIALIZER", "pickle")
+    if serializer_name not in SERIALIZERS:
+        raise ValueError(f"Sérialiseur de cache inconnu : {serializer_name}")
+    if serializer_name == "pickle" and pickle_protocol is not None:
+        serializer = PickleSerializer(pickle_protocol)
+    else:
+        serializer = SERIALIZERS[serializer_name]()
+
+    compressor_name = options.get("COMPRESSOR")
+    compressor = None
+    if compressor_name:
+        if compressor_name not in COMPRESSORS:
+            raise ValueError(f"Compresseur de cache inconnu : {compressor_name}")
+        compressor = COMPRESSORS[compressor_name]()
+
+    min_size = int(options.get("COMPRESS_MIN_SIZE", DEFAULT_COMPRESS_MIN_SIZE))
+    return ValueCodec(serializer, compressor, min_size)
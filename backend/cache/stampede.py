@@ -0,0 +1,56 @@
+import math
+import random
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+# Enveloppe sérialisable (pickle, json, msgpack) portant la durée du dernier calcul.
+XFETCH_MARKER = "__xfetch_delta__"
+
+
+def wrap(value: Any, delta: float) -> Dict[str, Any]:
+    return {XFETCH_MARKER: delta, "value": value}
+
+
+def unwrap(value: Any) -> Tuple[Any, Optional[float]]:
+    """Retourne (valeur, delta) ; delta vaut None pour une valeur écrite hors get_or_set."""
+    if isinstance(value, dict) and XFETCH_MARKER in value and len(value) == 2:
+        return value["value"], value[XFETCH_MARKER]
+    return value, None
+
+
+def should_refresh_early(expires: datetime, delta: Optional[float], beta: float, now: datetime) -> bool:
+    """
+    Rafraîchissement probabiliste anticipé (XFetch) : plus l’expiration approche
+    et plus le calcul est long, plus la probabilité de recalculer avant terme augmente.
+    """
+    if not delta or beta <= 0 or expires == datetime.max:
+        return False
+    remaining = (expires - now).total_seconds()
+    return -delta * beta * math.log(1.0 - random.random()) >= remaining
+
+
+class KeyedLocks:
+    """
+    Verrous par clé au sein du processus : les threads en échec de cache sur la même
+    clé attendent le même calcul au lieu de le relancer chacun.
+    """
+
+    def __init__(self):
+        self._guard = threading.Lock()
+        self._locks: Dict[str, List[Any]] = {}
+
+    @contextmanager
+    def hold(self, key: str):
+        with self._guard:
+            entry = self._locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._guard:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._locks[key]
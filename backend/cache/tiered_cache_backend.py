@@ -0,0 +1,269 @@
+import logging
+import pickle
+import threading
+import time
+import uuid
+import zlib
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.db import DatabaseError
+from django.utils.timezone import now as tz_now
+
+from monitoring.cache_metrics import CACHE_BYTES_WRITTEN, timed
+
+from .database_cache_backend import DatabaseCache
+from .stampede import unwrap
+
+logger = logging.getLogger(__name__)
+
+# Préfixe (hors préfixe/version) des lignes portant le jeton de génération de chaque compartiment.
+GENERATION_KEY = ":tiered:generation"
+
+# Génération d’un compartiment après une écriture locale : inconnue, resynchronisée au prochain sondage.
+_UNKNOWN = object()
+
+
+class LocalLRU:
+    """
+    Cache LRU en mémoire, borné en nombre d’entrées et en octets.
+    Les valeurs sont conservées picklées : un appelant qui modifie l’objet
+    reçu ne corrompt pas la copie locale.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._data: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return False, None
+            payload, deadline = entry
+            if deadline <= time.monotonic():
+                self._pop(key)
+                return False, None
+            self._data.move_to_end(key)
+        return True, pickle.loads(payload)
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        if ttl <= 0:
+            return
+        payload = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        if len(payload) > self.max_bytes:
+            return
+        with self._lock:
+            self._pop(key)
+            self._data[key] = (payload, time.monotonic() + ttl)
+            self._bytes += len(payload)
+            while self._data and (len(self._data) > self.max_entries or self._bytes > self.max_bytes):
+                self._pop(next(iter(self._data)))
+
+    def delete_many(self, keys: Iterable[str]) -> None:
+        with self._lock:
+            for key in keys:
+                self._pop(key)
+
+    def delete_where(self, predicate: Callable[[str], bool]) -> None:
+        with self._lock:
+            for key in [key for key in self._data if predicate(key)]:
+                self._pop(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def _pop(self, key: str) -> None:
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry[0])
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class TieredDatabaseCache(DatabaseCache):
+    """
+    Cache à deux niveaux : LRU local par processus devant le DatabaseCache.
+
+    - Les lectures (get, get_many, get_or_set) servent la copie locale tant qu’elle est
+      valide ; sa durée de vie est plafonnée par LOCAL_TIMEOUT et par l’expiration en base.
+    - Les clés sont réparties par hachage en GENERATION_BUCKETS compartiments, chacun
+      versionné par un jeton en base. Une écriture publie un nouveau jeton pour le
+      compartiment de ses clés (dans la même requête que la valeur pour ``set``) ; les
+      autres workers relisent tous les jetons en une requête au plus toutes les
+      GENERATION_POLL_INTERVAL secondes et n’évincent que les compartiments modifiés.
+
+    À réserver à un alias dédié aux clés lues très souvent et écrites rarement
+    (feature flags, plans de classement…).
+
+    OPTIONS : LOCAL_MAX_ENTRIES, LOCAL_MAX_BYTES, LOCAL_TIMEOUT, GENERATION_BUCKETS,
+    GENERATION_POLL_INTERVAL, en plus de celles du DatabaseCache.
+    """
+
+    def __init__(self, table: str, params: Dict[str, Any]):
+        super().__init__(table, params)
+        options = params.get("OPTIONS", {})
+        self._local = LocalLRU(
+            max_entries=int(options.get("LOCAL_MAX_ENTRIES", 1000)),
+            max_bytes=int(options.get("LOCAL_MAX_BYTES", 16 * 1024 * 1024)),
+        )
+        self._local_timeout = float(options.get("LOCAL_TIMEOUT", 60))
+        self._poll_interval = float(options.get("GENERATION_POLL_INTERVAL", 1.0))
+        self._generation_keys = [
+            self.make_and_validate_key(f"{GENERATION_KEY}:{bucket}")
+            for bucket in range(max(1, int(options.get("GENERATION_BUCKETS", 64))))
+        ]
+        self._generations: List[Any] = [None] * len(self._generation_keys)
+        self._last_poll = 0.0
+        self._poll_lock = threading.Lock()
+
+        # Les chemins async passent par les méthodes sync (sync_to_async) pour garder
+        # le niveau local et la génération cohérents.
+        self._async_native = False
+
+    # 🔄 Générations partagées
+
+    def _bucket(self, db_key: str) -> int:
+        return zlib.crc32(db_key.encode()) % len(self._generation_keys)
+
+    def _sync_generation(self) -> None:
+        """
+        Relit les jetons de génération si l’intervalle de sondage est écoulé et évince
+        du niveau local les clés des compartiments dont le jeton a changé.
+        """
+        if time.monotonic() - self._last_poll < self._poll_interval:
+            return
+        with self._poll_lock:
+            if time.monotonic() - self._last_poll < self._poll_interval:
+                return
+            entries = super()._fetch_many(self._generation_keys)
+            changed = set()
+            for bucket, generation_key in enumerate(self._generation_keys):
+                entry = entries.get(generation_key)
+                token = entry[0] if entry else None
+                # Pas de jeton (aucune écriture, ou ligne purgée) et aucun connu : rien à invalider.
+                if token != self._generations[bucket]:
+                    changed.add(bucket)
+                    self._generations[bucket] = token
+            if changed:
+                self._local.delete_where(lambda key: self._bucket(key) in changed)
+            self._last_poll = time.monotonic()
+
+    def _generation_row(self, bucket: int) -> Tuple[str, Any, datetime]:
+        return self._generation_keys[bucket], self._encode(uuid.uuid4().hex), self._expiry_for(None)
+
+    def _forget(self, buckets: Iterable[int]) -> None:
+        """
+        Après une publication : le jeton connu de ces compartiments est oublié, le prochain
+        sondage les évince donc aussi de ce processus (une écriture concurrente d’un autre
+        worker dans le même compartiment n’est pas masquée par la nôtre).
+        """
+        with self._poll_lock:
+            for bucket in buckets:
+                self._generations[bucket] = _UNKNOWN
+
+    def _publish(self, db_keys: List[str]) -> None:
+        """Évince ``db_keys`` localement et publie un nouveau jeton pour leurs compartiments."""
+        self._local.delete_many(db_keys)
+        self._bump({self._bucket(db_key) for db_key in db_keys})
+
+    def _bump(self, buckets: Iterable[int]) -> None:
+        buckets = list(buckets)
+        try:
+            with timed(self._alias, "set_many"):
+                self._write_rows([self._generation_row(bucket) for bucket in buckets])
+        except DatabaseError as e:
+            logger.warning(f"Database error during generation publish: {e}")
+        self._forget(buckets)
+
+    # 📖 Lectures
+
+    def _fetch_many(self, db_keys: List[str], raw: bool = False) -> Dict[str, Tuple[Any, datetime]]:
+        """Lecture en base ; les valeurs lues alimentent le niveau local."""
+        result = super()._fetch_many(db_keys, raw)
+        now = tz_now()
+        for db_key, (value, expires) in result.items():
+            ttl = min(self._local_timeout, (expires - now).total_seconds())
+            self._local.set(db_key, unwrap(value)[0] if raw else value, ttl)
+        return result
+
+    def get_many(self, keys: List[str], version: Optional[int] = None) -> Dict[str, Any]:
+        if not keys:
+            return {}
+        self._sync_generation()
+
+        key_map = {self.make_and_validate_key(key, version=version): key for key in keys}
+        result, missing = {}, []
+        for db_key, key in key_map.items():
+            hit, value = self._local.get(db_key)
+            if hit:
+                result[key] = value
+            else:
+                missing.append(db_key)
+
+        if missing:
+            for db_key, (value, _) in self._fetch_many(missing).items():
+                result[key_map[db_key]] = value
+        return result
+
+    def get_or_set(self, key: str, default: Any, timeout: int = DEFAULT_TIMEOUT, version: Optional[int] = None) -> Any:
+        self._sync_generation()
+        hit, value = self._local.get(self.make_and_validate_key(key, version))
+        if hit:
+            return value
+        return super().get_or_set(key, default, timeout, version)
+
+    def has_key(self, key: str, version: Optional[int] = None) -> bool:
+        self._sync_generation()
+        hit, _ = self._local.get(self.make_and_validate_key(key, version))
+        return hit or super().has_key(key, version)
+
+    # ✏️ Écritures
+
+    def _base_set(self, mode: str, key: str, value: Optional[Any], timeout: int = DEFAULT_TIMEOUT) -> bool:
+        if mode != "set":
+            written = super()._base_set(mode, key, value, timeout)
+            if written:
+                self._publish([key])
+            return written
+
+        # set : valeur et jeton de son compartiment en une seule requête multi-lignes.
+        self._ensure_culler()
+        bucket = self._bucket(key)
+        encoded = self._encode(value)
+        exp = self._expiry_for(self.get_backend_timeout(timeout))
+        try:
+            with timed(self._alias, mode):
+                self._write_rows([(key, encoded, exp), self._generation_row(bucket)])
+        except DatabaseError as e:
+            logger.warning(f"Database error during {mode}: {e}")
+            return False
+        CACHE_BYTES_WRITTEN.labels(self._alias).inc(len(encoded))
+        self._local.delete_many([key])
+        self._forget([bucket])
+        return True
+
+    def set_many(self, data: Dict[str, Any], timeout: int = DEFAULT_TIMEOUT, version: Optional[int] = None) -> List[str]:
+        failed = super().set_many(data, timeout, version)
+        if data:
+            self._publish([self.make_and_validate_key(key, version) for key in data])
+        return failed
+
+    def _base_delete_many(self, keys: List[str]) -> bool:
+        deleted = super()._base_delete_many(keys)
+        if keys:
+            self._publish(list(keys))
+        return deleted
+
+    def clear(self) -> None:
+        super().clear()
+        self._local.clear()
+        self._bump(range(len(self._generation_keys)))
@@ -0,0 +1,200 @@
+"""
+📊 Compteurs de documents par type, maintenus au fil des écritures ORM.
+
+La table ``oli_doc_type_stats`` porte une ligne par type de document. Chaque flush
+de session qui crée, supprime ou change le type d’un OliDocORM y applique ses deltas
+dans la même transaction : ``/stats`` lit O(nombre de types) lignes au lieu d’agréger
+toute la table des documents.
+
+Les écritures hors ORM (insert Core, SQL brut) doivent appeler ``apply_deltas``
+elles-mêmes ; ``reconcile`` recalcule la table depuis les documents et corrige toute dérive.
+``install`` crée la table si besoin et l’amorce : à lancer au déploiement (démarrage de
+l’API ou ``python -m backend.stats.doc_stats``), avant toute écriture de document.
+"""
+
+import logging
+from collections import Counter
+from datetime import datetime
+from typing import Dict
+
+from sqlalchemy import Column, DateTime, Integer, event, func, inspect as sa_inspect, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, declarative_base
+
+from OliPLUS.OliPLUS.oli_db_models import OliDocORM, OliDocTypeORM
+
+logger = logging.getLogger(__name__)
+
+# Même MetaData que les modèles cockpit : la table suit leur create_all / leurs migrations.
+StatsBase = declarative_base(metadata=OliDocORM.metadata)
+
+
+class DocTypeStatORM(StatsBase):
+    __tablename__ = "oli_doc_type_stats"
+
+    doc_type_id = Column(Integer, primary_key=True)
+    nb_documents = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+def apply_deltas(connection, deltas: Dict[int, int]) -> None:
+    """Ajoute ``deltas`` ({doc_type_id: ±n}) aux compteurs, sur la connexion de la transaction en cours."""
+    now = datetime.utcnow()
+    table = DocTypeStatORM.__table__
+    for doc_type_id, delta in deltas.items():
+        if not delta or doc_type_id is None:
+            continue
+        result = connection.execute(
+            update(table)
+            .where(table.c.doc_type_id == doc_type_id)
+            .values(nb_documents=table.c.nb_documents + delta, updated_at=now)
+        )
+        if result.rowcount == 0:
+            # Première écriture pour ce type : on part du décompte réel plutôt que du seul delta.
+            count = connection.execute(
+                select(func.count(OliDocORM.id)).where(OliDocORM.doc_type_id == doc_type_id)
+            ).scalar_one()
+            _insert_or_add(connection, doc_type_id, count, delta, now)
+
+
+def _insert_or_add(connection, doc_type_id: int, count: int, delta: int, now: datetime) -> None:
+    """
+    Crée le compteur d’un type ; si une transaction concurrente vient de le créer,
+    ajoute seulement notre delta (son décompte ne voyait pas nos lignes non validées).
+    """
+    table = DocTypeStatORM.__table__
+    dialect = connection.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        dialect_insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        stmt = dialect_insert(table).values(doc_type_id=doc_type_id, nb_documents=count, updated_at=now)
+        connection.execute(stmt.on_conflict_do_update(
+            index_elements=[table.c.doc_type_id],
+            set_={"nb_documents": table.c.nb_documents + delta, "updated_at": now},
+        ))
+        return
+    try:
+        with connection.begin_nested():
+            connection.execute(table.insert().values(doc_type_id=doc_type_id, nb_documents=count, updated_at=now))
+    except IntegrityError:
+        connection.execute(
+            update(table)
+            .where(table.c.doc_type_id == doc_type_id)
+            .values(nb_documents=table.c.nb_documents + delta, updated_at=now)
+        )
+
+
+def _deleted_deltas(session: Session) -> Counter:
+    deltas = Counter()
+    for obj in session.deleted:
+        if isinstance(obj, OliDocORM):
+            history = sa_inspect(obj).attrs.doc_type_id.history
+            deltas[(history.deleted or history.unchanged or [obj.doc_type_id])[0]] -= 1
+    return deltas
+
+
+def _flush_deltas(session: Session) -> Counter:
+    deltas = session.info.pop(_PENDING_DELETES, None) or Counter()
+    for obj in session.new:
+        if isinstance(obj, OliDocORM):
+            deltas[obj.doc_type_id] += 1
+    for obj in session.dirty:
+        if isinstance(obj, OliDocORM) and obj not in session.deleted:
+            history = sa_inspect(obj).attrs.doc_type_id.history
+            if history.has_changes():
+                for old in history.deleted:
+                    deltas[old] -= 1
+                for new in history.added:
+                    deltas[new] += 1
+    return deltas
+
+
+_PENDING_DELETES = "doc_stats_pending_deletes"
+
+
+@event.listens_for(Session, "before_flush")
+def _capture_deletes(session: Session, flush_context, instances) -> None:
+    # Après le flush, les instances supprimées sont expirées : leur type ne se relit plus.
+    # Remplacé à chaque flush : un flush en échec puis rejoué ne compte pas deux fois.
+    session.info[_PENDING_DELETES] = _deleted_deltas(session)
+
+
+@event.listens_for(Session, "after_flush")
+def _track_doc_counts(session: Session, flush_context) -> None:
+    # Historique encore disponible ici ; les clés étrangères des nouveaux objets sont renseignées.
+    deltas = _flush_deltas(session)
+    if any(deltas.values()):
+        apply_deltas(session.connection(), deltas)
+
+
+def reconcile(db: Session) -> int:
+    """
+    Recalcule la table depuis les documents (un GROUP BY) et remplace son contenu ;
+    chaque type connu y a sa ligne, à 0 s’il n’a pas de document.
+    Retourne le nombre de compteurs corrigés.
+    """
+    table = DocTypeStatORM.__table__
+    now = datetime.utcnow()
+    actual = dict.fromkeys(db.execute(select(OliDocTypeORM.id)).scalars(), 0)
+    actual.update(
+        db.execute(
+            select(OliDocORM.doc_type_id, func.count(OliDocORM.id))
+            .where(OliDocORM.doc_type_id.isnot(None))
+            .group_by(OliDocORM.doc_type_id)
+        ).all()
+    )
+    stored = dict(db.execute(select(table.c.doc_type_id, table.c.nb_documents)).all())
+
+    fixed = 0
+    for doc_type_id in stored.keys() - actual.keys():
+        db.execute(table.delete().where(table.c.doc_type_id == doc_type_id))
+        fixed += 1
+    for doc_type_id, count in actual.items():
+        if doc_type_id not in stored:
+            db.execute(table.insert().values(doc_type_id=doc_type_id, nb_documents=count, updated_at=now))
+        elif stored[doc_type_id] != count:
+            db.execute(
+                update(table).where(table.c.doc_type_id == doc_type_id).values(nb_documents=count, updated_at=now)
+            )
+        else:
+            continue
+        fixed += 1
+    db.commit()
+    if fixed:
+        logger.warning("📊 Réconciliation des statistiques : %d compteurs corrigés", fixed)
+    return fixed
+
+
+def install(db: Session) -> int:
+    """Crée la table des compteurs si elle n’existe pas, puis l’amorce (``reconcile``)."""
+    DocTypeStatORM.__table__.create(db.get_bind(), checkfirst=True)
+    return reconcile(db)
+
+
+def read_stats(db: Session) -> list:
+    """Compteurs par nom de type, avec leur date de mise à jour ; réconcilie si un type n’a pas de ligne."""
+    query = (
+        db.query(OliDocTypeORM.nom, DocTypeStatORM.nb_documents, DocTypeStatORM.updated_at)
+        .outerjoin(DocTypeStatORM, DocTypeStatORM.doc_type_id == OliDocTypeORM.id)
+    )
+    rows = query.all()
+    if any(count is None for _, count, _ in rows):
+        reconcile(db)
+        rows = query.all()
+    return [
+        {"type": nom, "nb_documents": count, "as_of": as_of}
+        for nom, count, as_of in rows
+        if count
+    ]
+
+
+if __name__ == "__main__":
+    # Installation / réconciliation : python -m backend.stats.doc_stats (déploiement, cron)
+    from OliPLUS.OliPLUS.oli_db_models import get_db
+
+    logging.basicConfig(level=logging.INFO)
+    db_gen = get_db()
+    try:
+        print(f"{install(next(db_gen))} compteurs corrigés")
+    finally:
+        db_gen.close()
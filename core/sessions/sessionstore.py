@@ -3,14 +3,59 @@ Cached, database-backed sessions.
 """
 
 import logging
+import threading
 
 from django.conf import settings
 from django.contrib.sessions.backends.db import SessionStore as DBStore
 from django.core.cache import caches
+from django.db import DatabaseError, connections, router, transaction
+
+from .write_behind import WriteBehindQueue
 
 KEY_PREFIX = "django.contrib.sessions.cached_db"
 logger = logging.getLogger("django.contrib.sessions")
 
+_write_behind_queue = None
+_write_behind_lock = threading.Lock()
+
+
+def _flush_sessions(records):
+    """
+    Écrit en une transaction les sessions en attente : [(session_key, (session_data, expire_date)), …].
+    """
+    model = DBStore.get_model_class()
+    objs = [
+        model(session_key=key, session_data=data, expire_date=expire_date)
+        for key, (data, expire_date) in records
+    ]
+    using = router.db_for_write(model)
+    try:
+        with transaction.atomic(using=using):
+            model.objects.using(using).bulk_update(objs, ["session_data", "expire_date"], batch_size=500)
+    except DatabaseError:
+        # Connexion propre au thread du flusher : on repart d’une connexion neuve au prochain lot.
+        connections[using].close()
+        raise
+
+
+def get_write_behind_queue():
+    """
+    File d’écriture différée partagée par le processus, ou None si
+    SESSION_WRITE_BEHIND est désactivé (défaut). Voir write_behind.py pour la sémantique de perte.
+    """
+    global _write_behind_queue
+    if not getattr(settings, "SESSION_WRITE_BEHIND", False):
+        return None
+    if _write_behind_queue is None:
+        with _write_behind_lock:
+            if _write_behind_queue is None:
+                _write_behind_queue = WriteBehindQueue(
+                    _flush_sessions,
+                    max_staleness=getattr(settings, "SESSION_WRITE_BEHIND_MAX_STALENESS", 5.0),
+                    max_pending=getattr(settings, "SESSION_WRITE_BEHIND_MAX_PENDING", 10000),
+                )
+    return _write_behind_queue
+
 
 class SessionStore(DBStore):
     """
@@ -19,6 +64,7 @@ class SessionStore(DBStore):
     - Lecture rapide via cache
     - Fallback vers la base si cache manquant
     - Support des opérations asynchrones
+    - Écriture différée optionnelle en base (SESSION_WRITE_BEHIND)
     """
 
     cache_key_prefix = KEY_PREFIX
@@ -43,6 +89,9 @@ class SessionStore(DBStore):
         except Exception:
             data = None
 
+        if data is None:
+            data = self._pending_session_data()
+
         if data is None:
             session = self._get_session_from_db()
             if session:
@@ -65,6 +114,9 @@ class SessionStore(DBStore):
         except Exception:
             data = None
 
+        if data is None:
+            data = self._pending_session_data()
+
         if data is None:
             session = await self._aget_session_from_db()
             if session:
@@ -78,6 +130,16 @@ class SessionStore(DBStore):
                 data = {}
         return data
 
+    def _pending_session_data(self):
+        """
+        Données encore en file d’écriture différée (cache évincé avant le flush).
+        """
+        queue = get_write_behind_queue()
+        if queue is None or self.session_key is None:
+            return None
+        record = queue.pending(self.session_key)
+        return self.decode(record[0]) if record else None
+
     def exists(self, session_key):
         """
         Vérifie si la session existe dans le cache ou la base.
@@ -101,7 +163,19 @@ class SessionStore(DBStore):
     def save(self, must_create=False):
         """
         Sauvegarde la session dans la base et le cache.
-        """
+        En écriture différée, seule la mise en cache est synchrone.
+        """
+        queue = get_write_behind_queue()
+        if queue is not None and not must_create and self.session_key is not None:
+            data = self._get_session(no_load=False)
+            try:
+                self._cache.set(self.cache_key, data, self.get_expiry_age())
+            except Exception:
+                logger.exception("Error saving to cache (%s)", self._cache)
+            else:
+                if queue.enqueue(self.session_key, (self.encode(data), self.get_expiry_date())):
+                    return
+
         super().save(must_create)
         try:
             self._cache.set(self.cache_key, self._session, self.get_expiry_age())
@@ -111,7 +185,19 @@ class SessionStore(DBStore):
     async def asave(self, must_create=False):
         """
         Sauvegarde asynchrone dans la base et le cache.
-        """
+        En écriture différée, seule la mise en cache est attendue.
+        """
+        queue = get_write_behind_queue()
+        if queue is not None and not must_create and self.session_key is not None:
+            data = await self._aget_session(no_load=False)
+            try:
+                await self._cache.aset(await self.acache_key(), data, await self.aget_expiry_age())
+            except Exception:
+                logger.exception("Error saving to cache (%s)", self._cache)
+            else:
+                if queue.enqueue(self.session_key, (self.encode(data), await self.aget_expiry_date())):
+                    return
+
         await super().asave(must_create)
         try:
             await self._cache.aset(
@@ -131,6 +217,7 @@ class SessionStore(DBStore):
             if self.session_key is None:
                 return
             session_key = self.session_key
+        self._discard_pending(session_key)
         self._cache.delete(self.cache_key_prefix + session_key)
 
     async def adelete(self, session_key=None):
@@ -142,8 +229,15 @@ class SessionStore(DBStore):
             if self.session_key is None:
                 return
             session_key = self.session_key
+        self._discard_pending(session_key)
         await self._cache.adelete(self.cache_key_prefix + session_key)
 
+    @staticmethod
+    def _discard_pending(session_key):
+        queue = get_write_behind_queue()
+        if queue is not None:
+            queue.discard(session_key)
+
     def flush(self):
         """
         Réinitialise la session (base + cache).
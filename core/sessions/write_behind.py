@@ -0,0 +1,123 @@
+"""
+File d’écriture différée (write-behind) pour la persistance des sessions.
+
+Sémantique de perte :
+
+- Le cache reste écrit de façon synchrone ; seule l’écriture en base est différée.
+- Les écritures d’une même session sont fusionnées : seule la dernière version part en base.
+- Le flusher vide la file au plus toutes les ``max_staleness`` secondes, en une transaction.
+- À l’arrêt normal du processus (atexit), la file est vidée avant de quitter.
+- En cas d’arrêt brutal (SIGKILL, OOM, crash machine), les modifications des
+  ``max_staleness`` dernières secondes ne sont pas en base. Elles restent lisibles
+  tant que l’entrée de cache survit ; au-delà, la session revient à sa dernière
+  version persistée.
+- Si l’écriture d’un lot échoue, les enregistrements sont remis en file (sauf s’ils
+  ont été remplacés entre-temps par une version plus récente).
+"""
+
+import atexit
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("django.contrib.sessions")
+
+Record = Tuple[str, Any]
+
+
+class WriteBehindQueue:
+    """
+    File bornée, fusionnée par clé, vidée par un thread d’arrière-plan.
+
+    :param flush_func: reçoit une liste ``[(clé, enregistrement), …]`` et l’écrit en une transaction.
+    :param max_staleness: délai maximal (secondes) entre la mise en file et l’écriture.
+    :param max_pending: au-delà, le flusher est réveillé immédiatement ; au double,
+        ``enqueue`` refuse l’écriture et l’appelant doit écrire de façon synchrone.
+    """
+
+    def __init__(
+        self,
+        flush_func: Callable[[List[Record]], None],
+        max_staleness: float = 5.0,
+        max_pending: int = 10000,
+    ):
+        self._flush_func = flush_func
+        self.max_staleness = max_staleness
+        self.max_pending = max_pending
+        self._pending: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+
+    def enqueue(self, key: str, record: Any) -> bool:
+        """
+        Met en file (ou remplace) l’écriture d’une clé.
+        Retourne False si la file est saturée ou arrêtée.
+        """
+        with self._lock:
+            if self._stopped or (key not in self._pending and len(self._pending) >= 2 * self.max_pending):
+                return False
+            self._pending[key] = record
+            size = len(self._pending)
+        self._ensure_started()
+        if size >= self.max_pending:
+            self._wakeup.set()
+        return True
+
+    def pending(self, key: str) -> Optional[Any]:
+        """Enregistrement en attente pour une clé, s’il n’est pas encore en base."""
+        with self._lock:
+            return self._pending.get(key)
+
+    def discard(self, key: str) -> None:
+        with self._lock:
+            self._pending.pop(key, None)
+
+    def flush(self) -> int:
+        """Écrit tout ce qui est en file ; retourne le nombre d’enregistrements écrits."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return 0
+            records = list(batch.items())
+            try:
+                self._flush_func(records)
+            except Exception:
+                logger.exception("Échec de l’écriture différée de %d sessions, remise en file", len(records))
+                with self._lock:
+                    for key, record in records:
+                        self._pending.setdefault(key, record)
+                return 0
+            return len(records)
+
+    def stop(self) -> None:
+        """Arrête le flusher après avoir vidé la file."""
+        with self._lock:
+            self._stopped = True
+        self._wakeup.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=self.max_staleness + 5)
+        self.flush()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="session-write-behind", daemon=True)
+                self._thread.start()
+                atexit.register(self.stop)
+
+    def _run(self) -> None:
+        while not self._stopped:
+            deadline = time.monotonic() + self.max_staleness
+            self._wakeup.wait(timeout=max(0.0, deadline - time.monotonic()))
+            self._wakeup.clear()
+            self.flush()
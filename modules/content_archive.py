@@ -0,0 +1,126 @@
+"""
+📦 Archive adressée par contenu de .cockpit-archive.
+
+- ``blobs/<aa>/<sha256>.txt`` : texte extrait, stocké une seule fois par fichier source
+  (clé : SHA-256 du PDF).
+- ``<titre>/`` : métadonnées (json, md, yaml) et ``content.sha256``, référence vers le blob.
+- ``index.json`` : ``{sha256: {blob, size, titles, created_at, last_seen, uploads}}``,
+  mis à jour sous verrou de fichier (plusieurs workers écrivent dans la même archive).
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Union
+
+try:
+    import fcntl
+except ImportError:  # Windows : verrou limité au processus courant
+    fcntl = None
+
+logger = logging.getLogger("content_archive")
+
+ARCHIVE_ROOT = Path(".cockpit-archive")
+HASH_CHUNK_SIZE = 1024 * 1024
+_process_lock = threading.Lock()
+
+
+def file_sha256(path: Union[str, Path]) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def title_dir(title: str, root: Path = ARCHIVE_ROOT) -> Path:
+    return root / title.replace(" ", "_").replace("/", "_")
+
+
+def blob_path(sha256: str, root: Path = ARCHIVE_ROOT) -> Path:
+    return root / "blobs" / sha256[:2] / f"{sha256}.txt"
+
+
+def _atomic_write(path: Path, data: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+@contextmanager
+def locked_index(root: Path = ARCHIVE_ROOT) -> Iterator[Dict[str, dict]]:
+    """🔒 Index chargé sous verrou exclusif ; réécrit (atomiquement) à la sortie du bloc."""
+    root.mkdir(parents=True, exist_ok=True)
+    index_path = root / "index.json"
+    with _process_lock, open(root / "index.lock", "a") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            index = json.loads(index_path.read_text(encoding="utf-8")) if index_path.exists() else {}
+            yield index
+            _atomic_write(index_path, json.dumps(index, ensure_ascii=False, indent=1))
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def lookup(sha256: str, root: Path = ARCHIVE_ROOT) -> Optional[dict]:
+    """Entrée d’index d’un contenu déjà archivé (et dont le blob existe encore), sinon None."""
+    index_path = root / "index.json"
+    if not index_path.exists():
+        return None
+    entry = json.loads(index_path.read_text(encoding="utf-8")).get(sha256)
+    if entry is None or not (root / entry["blob"]).exists():
+        return None
+    return entry
+
+
+def store(sha256: str, title: str, content: Optional[str] = None, root: Path = ARCHIVE_ROOT) -> Path:
+    """
+    Enregistre ``title`` comme référence du contenu ``sha256``. Le blob est écrit si
+    ``content`` est fourni et absent de l’archive ; retourne le chemin du blob.
+    """
+    blob = blob_path(sha256, root)
+    if content is not None and not blob.exists():
+        _atomic_write(blob, content)
+    now = datetime.utcnow().isoformat()
+    with locked_index(root) as index:
+        entry = index.get(sha256)
+        if entry is None:
+            # Taille lue à la création seulement : le blob d’une entrée existante peut avoir été purgé.
+            entry = index[sha256] = {
+                "blob": blob.relative_to(root).as_posix(),
+                "size": blob.stat().st_size,
+                "titles": [],
+                "created_at": now,
+                "uploads": 0,
+            }
+        if title not in entry["titles"]:
+            entry["titles"].append(title)
+        entry["uploads"] += 1
+        entry["last_seen"] = now
+    _atomic_write(title_dir(title, root) / "content.sha256", sha256 + "\n")
+    return blob
+
+
+def read_content(title: str, root: Path = ARCHIVE_ROOT) -> Optional[str]:
+    """Texte archivé d’un titre (référence vers un blob, ou content.txt des archives antérieures)."""
+    directory = title_dir(title, root)
+    ref = directory / "content.sha256"
+    if ref.exists():
+        blob = blob_path(ref.read_text(encoding="utf-8").strip(), root)
+        return blob.read_text(encoding="utf-8") if blob.exists() else None
+    legacy = directory / "content.txt"
+    return legacy.read_text(encoding="utf-8") if legacy.exists() else None
@@ -1,11 +1,12 @@
 import os
 from pathlib import Path
-from typing import Union, Dict
-import fitz  # PyMuPDF
+from typing import Union, Dict, Optional
 import yaml
 from pydantic import BaseModel, ValidationError
 from modules.exceptions import DocumentUploadError, OCRProcessingFailure, PermissionDeniedError
 from modules.permissions import has_permission_to_upload
+from modules.pdf.extraction_cache import extract_pages
+from modules import content_archive
 import logging
 
 logger = logging.getLogger("document_ingestor")
@@ -20,23 +21,26 @@ class DocumentMetadata(BaseModel):
     document_type: str
 
 
-def extract_text_from_pdf(pdf_path: Path) -> str:
-    """📄 Extrait le texte OCR d’un PDF via PyMuPDF."""
+def extract_text_from_pdf(pdf_path: Path, sha256: Optional[str] = None) -> str:
+    """📄 Extrait le texte OCR d’un PDF via PyMuPDF (pages en parallèle, résultat mis en cache)."""
     try:
-        doc = fitz.open(pdf_path)
-        return "\n".join(page.get_text() for page in doc)
+        return "\n".join(extract_pages(pdf_path, sha256=sha256))
     except Exception as e:
         raise OCRProcessingFailure(f"OCR failed on {pdf_path.name}: {e}")
 
 
-def archive_document(meta: DocumentMetadata, content: str) -> Path:
-    """📦 Archive le contenu et les métadonnées dans .cockpit-archive."""
-    safe_name = meta.title.replace(" ", "_").replace("/", "_")
-    destination = Path(".cockpit-archive") / safe_name
+def archive_document(meta: DocumentMetadata, content: Optional[str], sha256: str) -> Path:
+    """
+    📦 Archive les métadonnées dans .cockpit-archive/<titre> et le contenu dans un blob
+    adressé par le SHA-256 du PDF source (``content=None`` : blob déjà présent, seule la
+    référence est ajoutée). L’empreinte du PDF est obligatoire : un condensé du texte ne
+    partagerait pas l’espace de clés de l’index.
+    """
+    destination = content_archive.title_dir(meta.title)
     destination.mkdir(parents=True, exist_ok=True)
 
-    # Texte brut
-    (destination / "content.txt").write_text(content, encoding="utf-8")
+    # Texte brut : blob partagé, référencé par content.sha256
+    content_archive.store(sha256, meta.title, content)
 
     # Métadonnées JSON
     (destination / "metadata.json").write_text(meta.model_dump_json(indent=2), encoding="utf-8")
@@ -53,12 +57,17 @@ def archive_document(meta: DocumentMetadata, content: str) -> Path:
     with (destination / "metadata.yaml").open("w", encoding="utf-8") as f:
         yaml.dump(meta.model_dump(), f, sort_keys=False, allow_unicode=True)
 
-    logger.info(f"📦 Document archivé dans {destination.resolve()}")
+    logger.info(f"📦 Document archivé dans {destination.resolve()} (contenu {sha256[:12]})")
     return destination
 
 
-def upload_and_parse_document(user: str, pdf_path: Union[str, Path], metadata: Dict) -> str:
-    """🚀 Pipeline complet d’ingestion cockpit."""
+def upload_and_parse_document(
+    user: str, pdf_path: Union[str, Path], metadata: Dict, sha256: Optional[str] = None
+) -> str:
+    """
+    🚀 Pipeline complet d’ingestion cockpit.
+    Un PDF déjà archivé (même SHA-256) n’est pas réextrait : seul le titre est ajouté.
+    """
     pdf_path = Path(pdf_path)
 
     try:
@@ -72,8 +81,15 @@ def upload_and_parse_document(user: str, pdf_path: Union[str, Path], metadata: D
     if not pdf_path.exists():
         raise DocumentUploadError(f"PDF file not found: {pdf_path}")
 
-    text_content = extract_text_from_pdf(pdf_path)
-    archive_document(meta, text_content)
+    sha256 = sha256 or content_archive.file_sha256(pdf_path)
+    duplicate = content_archive.lookup(sha256)
+    if duplicate is not None:
+        archive_document(meta, None, sha256)
+        logger.info(f"♻️ Doublon de {duplicate['titles'][0]!r} : extraction évitée pour « {meta.title} ».")
+        return f"✅ Document « {meta.title} » uploaded and cockpitified (contenu déjà archivé)."
+
+    text_content = extract_text_from_pdf(pdf_path, sha256)
+    archive_document(meta, text_content, sha256)
 
     logger.info(f"✅ Document « {meta.title} » uploaded and cockpitified.")
     return f"✅ Document « {meta.title} » uploaded and cockpitified."
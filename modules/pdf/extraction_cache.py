@@ -0,0 +1,258 @@
+"""
+🗃️ Cache persistant des extractions de texte PDF.
+
+Clé : (SHA-256 du fichier, extracteur, options, version de PyMuPDF) ; un changement
+de bibliothèque ou de réglage invalide donc naturellement les entrées.
+
+Une entrée = un fichier ``<aa>/<clé>.bin`` :
+
+- en-tête ``<6sI>`` : signature, nombre de pages ;
+- table des pages ``<QI>`` × n : décalage (depuis la zone de données) et longueur ;
+- données : texte de chaque page, UTF-8 compressé zlib, page par page (une page se
+  relit sans décompresser le reste du document).
+
+Éviction LRU (date de modification rafraîchie à chaque lecture) dès que le volume sur
+disque, tous processus confondus, dépasse ``max_bytes`` ; chaque lecture ajoute son hit ou
+son miss à ``stats.json``. Les deux passent par un verrou de fichier : les workers
+d’extraction (ProcessPoolExecutor, sortis par ``os._exit`` sans ``atexit``) partagent le cache.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import struct
+import tempfile
+import threading
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Union
+
+try:
+    import fcntl
+except ImportError:  # Windows : statistiques et éviction sans verrou inter-processus
+    fcntl = None
+
+logger = logging.getLogger("pdf_extract")
+
+DEFAULT_ROOT = Path(os.getenv("PDF_EXTRACT_CACHE_DIR", ".cockpit-cache/extraction"))
+DEFAULT_MAX_BYTES = int(os.getenv("PDF_EXTRACT_CACHE_MAX_MB", "1024")) * 1024 * 1024
+CACHE_ENABLED = os.getenv("PDF_EXTRACT_CACHE", "1") != "0"
+
+MAGIC = b"OLIXC1"
+_HEADER = struct.Struct("<6sI")
+_ENTRY = struct.Struct("<QI")
+
+
+def library_version() -> str:
+    import fitz  # PyMuPDF, importé à la demande : le cache lui-même n’en dépend pas
+
+    return getattr(fitz, "VersionBind", None) or fitz.version[0]
+
+
+class ExtractionCache:
+    def __init__(self, root: Union[str, Path] = DEFAULT_ROOT, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    # 🔑 Clés
+
+    @staticmethod
+    def make_key(sha256: str, extractor: str, options: Optional[Dict] = None, version: Optional[str] = None) -> str:
+        payload = json.dumps(
+            [sha256, extractor, options or {}, version or library_version()],
+            sort_keys=True, separators=(",", ":"),
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.bin"
+
+    # 📖 Lecture
+
+    def get(self, key: str) -> Optional[List[str]]:
+        """Textes de toutes les pages, ou None (miss ou entrée illisible)."""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                table = self._read_table(f)
+                data = f.read()
+            pages = [zlib.decompress(data[o:o + n]).decode("utf-8") for o, n in table]
+        except (OSError, ValueError, zlib.error, struct.error):
+            self._record(hit=False)
+            return None
+        self._touch(path)
+        self._record(hit=True)
+        return pages
+
+    def get_page(self, key: str, index: int) -> Optional[str]:
+        """Texte d’une seule page, lu via la table des décalages."""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                table = self._read_table(f)
+                offset, length = table[index]
+                f.seek(_HEADER.size + len(table) * _ENTRY.size + offset)
+                text = zlib.decompress(f.read(length)).decode("utf-8")
+        except (OSError, ValueError, IndexError, zlib.error, struct.error):
+            self._record(hit=False)
+            return None
+        self._touch(path)
+        self._record(hit=True)
+        return text
+
+    @staticmethod
+    def _read_table(f) -> List[tuple]:
+        magic, count = _HEADER.unpack(f.read(_HEADER.size))
+        if magic != MAGIC:
+            raise ValueError("signature de cache invalide")
+        raw = f.read(count * _ENTRY.size)
+        return [_ENTRY.unpack_from(raw, i * _ENTRY.size) for i in range(count)]
+
+    # ✏️ Écriture
+
+    def put(self, key: str, pages: List[str]) -> None:
+        blobs = [zlib.compress(text.encode("utf-8"), 6) for text in pages]
+        table, offset = [], 0
+        for blob in blobs:
+            table.append(_ENTRY.pack(offset, len(blob)))
+            offset += len(blob)
+
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(_HEADER.pack(MAGIC, len(pages)))
+                f.write(b"".join(table))
+                f.write(b"".join(blobs))
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        self.evict()
+
+    # 🧹 Éviction
+
+    def _entries(self) -> List[tuple]:
+        entries = []
+        for path in self.root.glob("*/*.bin"):
+            try:
+                entries.append((path, path.stat()))
+            except FileNotFoundError:  # évincée entre-temps par un autre processus
+                continue
+        return entries
+
+    @contextmanager
+    def _locked(self, name: str) -> Iterator[None]:
+        """🔒 Verrou exclusif partagé par les threads et les processus utilisant ``root``."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        with self._lock, open(self.root / name, "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def evict(self) -> int:
+        """
+        Supprime les entrées les moins récemment lues jusqu’à repasser sous 90 % de max_bytes.
+        Le volume est relu sur disque : les écritures des autres processus comptent.
+        """
+        with self._locked("evict.lock"):
+            entries = self._entries()
+            size = sum(st.st_size for _, st in entries)
+            if size <= self.max_bytes:
+                return 0
+            removed = 0
+            for path, st in sorted(entries, key=lambda e: e[1].st_mtime):
+                if size <= self.max_bytes * 0.9:
+                    break
+                path.unlink(missing_ok=True)
+                size -= st.st_size
+                removed += 1
+        logger.info(f"🧹 Cache d’extraction : {removed} entrées évincées")
+        return removed
+
+    @staticmethod
+    def _touch(path: Path) -> None:
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    # 📊 Statistiques
+
+    def _record(self, hit: bool) -> None:
+        """Ajoute le résultat d’une lecture à stats.json, sans attendre la fin du processus."""
+        with self._locked("stats.lock"):
+            totals = self._read_stats()
+            totals["hits" if hit else "misses"] += 1
+            (self.root / "stats.json").write_text(json.dumps(totals), encoding="utf-8")
+
+    def _read_stats(self) -> Dict[str, int]:
+        stats_path = self.root / "stats.json"
+        totals = json.loads(stats_path.read_text(encoding="utf-8")) if stats_path.exists() else {}
+        return {"hits": totals.get("hits", 0), "misses": totals.get("misses", 0)}
+
+    def report(self) -> Dict[str, float]:
+        """📊 Taux de hits cumulé (tous processus), nombre d’entrées et volume sur disque."""
+        with self._locked("stats.lock"):
+            totals = self._read_stats()
+        lookups = totals["hits"] + totals["misses"]
+        entries = self._entries()
+        return {
+            "hits": totals["hits"],
+            "misses": totals["misses"],
+            "hit_rate": totals["hits"] / lookups if lookups else 0.0,
+            "entries": len(entries),
+            "bytes": sum(st.st_size for _, st in entries),
+            "max_bytes": self.max_bytes,
+        }
+
+
+_default_cache: Optional[ExtractionCache] = None
+
+
+def default_cache() -> ExtractionCache:
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ExtractionCache()
+    return _default_cache
+
+
+def extract_pages(
+    pdf_path: Union[str, Path],
+    mode: str = "text",
+    workers: Optional[int] = None,
+    sha256: Optional[str] = None,
+    cache: Optional[ExtractionCache] = None,
+) -> List[str]:
+    """
+    📄 Textes des pages d’un PDF, servis par le cache si possible, sinon extraits en
+    parallèle (modules.pdf.parallel_extract) puis mis en cache.
+    """
+    from modules.pdf.parallel_extract import iter_page_texts
+
+    if not CACHE_ENABLED and cache is None:
+        return [text for _, text in iter_page_texts(pdf_path, workers=workers, mode=mode)]
+
+    from modules.content_archive import file_sha256
+
+    cache = cache or default_cache()
+    key = cache.make_key(sha256 or file_sha256(pdf_path), "fitz.get_text", {"mode": mode})
+    pages = cache.get(key)
+    if pages is None:
+        pages = [text for _, text in iter_page_texts(pdf_path, workers=workers, mode=mode)]
+        cache.put(key, pages)
+    return pages
+
+
+if __name__ == "__main__":
+    # Rapport : python -m modules.pdf.extraction_cache
+    for name, value in default_cache().report().items():
+        print(f"{name:>10} : {value:.2%}" if name == "hit_rate" else f"{name:>10} : {value}")
@@ -0,0 +1,94 @@
+import logging
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple, Union
+
+import fitz  # PyMuPDF
+
+try:
+    import resource
+except ImportError:  # Windows : pas de plafond mémoire par processus
+    resource = None
+
+logger = logging.getLogger("pdf_extract")
+
+# ⚙️ Réglages par défaut (surchargés par variables d’environnement)
+DEFAULT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1))))
+DEFAULT_MAX_MEMORY_MB = int(os.getenv("PDF_EXTRACT_MAX_MEMORY_MB", "0"))  # 0 : pas de plafond
+PAGES_PER_TASK = 32
+MIN_PAGES_FOR_POOL = 24  # en dessous, le démarrage des processus coûte plus qu’il ne rapporte
+
+
+def page_count(pdf_path: Union[str, Path]) -> int:
+    with fitz.open(pdf_path) as doc:
+        return doc.page_count
+
+
+def _limit_memory(max_bytes: int) -> None:
+    """Initialiseur des workers : plafonne l’espace d’adressage (MemoryError au-delà)."""
+    if max_bytes and resource is not None:
+        resource.setrlimit(resource.RLIMIT_AS, (max_bytes, max_bytes))
+
+
+def _extract_range(pdf_path: str, start: int, stop: int, mode: str) -> List[str]:
+    """Exécuté dans un worker : ouvre son propre document fitz et extrait les pages [start, stop)."""
+    with fitz.open(pdf_path) as doc:
+        return [doc[i].get_text(mode) for i in range(start, stop)]
+
+
+def iter_page_texts(
+    pdf_path: Union[str, Path],
+    workers: Optional[int] = None,
+    max_memory_mb: Optional[int] = None,
+    pages_per_task: int = PAGES_PER_TASK,
+    mode: str = "text",
+) -> Iterator[Tuple[int, str]]:
+    """
+    🧵 Extrait le texte des pages d’un PDF en parallèle, par plages de pages.
+
+    Les résultats sont restitués dans l’ordre des pages, au fil de l’eau : au plus
+    ``2 × workers`` plages sont en vol, la mémoire ne dépend donc pas de la taille du PDF.
+
+    :param workers: nombre de processus (1 : extraction en série dans le processus courant).
+    :param max_memory_mb: plafond d’espace d’adressage par worker (Unix).
+    :param pages_per_task: taille des plages confiées à un worker.
+    :param mode: mode ``page.get_text`` (« text », « blocks »…).
+    :return: générateur de ``(index_page, texte)``.
+    """
+    pdf_path = str(pdf_path)
+    workers = DEFAULT_WORKERS if workers is None else max(1, workers)
+    max_memory_mb = DEFAULT_MAX_MEMORY_MB if max_memory_mb is None else max_memory_mb
+    total = page_count(pdf_path)
+
+    if workers == 1 or total < MIN_PAGES_FOR_POOL:
+        with fitz.open(pdf_path) as doc:
+            for page_index, page in enumerate(doc):
+                yield page_index, page.get_text(mode)
+        return
+
+    ranges = iter([(start, min(start + pages_per_task, total)) for start in range(0, total, pages_per_task)])
+    pool = ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_limit_memory,
+        initargs=(max_memory_mb * 1024 * 1024,),
+    )
+    in_flight = deque()
+    try:
+        for start, stop in ranges:
+            in_flight.append((start, pool.submit(_extract_range, pdf_path, start, stop, mode)))
+            if len(in_flight) >= 2 * workers:
+                break
+        while in_flight:
+            start, future = in_flight.popleft()
+            texts = future.result()
+            next_range = next(ranges, None)
+            if next_range is not None:
+                in_flight.append((next_range[0], pool.submit(_extract_range, pdf_path, *next_range, mode)))
+            for offset, text in enumerate(texts):
+                yield start + offset, text
+    finally:
+        # Générateur abandonné ou erreur : les plages non démarrées sont annulées.
+        pool.shutdown(wait=True, cancel_futures=True)
+    logger.debug(f"{total} pages extraites de {pdf_path} par {workers} workers")
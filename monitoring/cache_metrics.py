@@ -0,0 +1,26 @@
+import time
+from contextlib import contextmanager
+
+from monitoring.prometheus_setup import counter, histogram
+
+CACHE_HITS = counter("oliplus_db_cache_hits_total", "Clés trouvées et valides dans le cache DB", ("alias",))
+CACHE_MISSES = counter("oliplus_db_cache_misses_total", "Clés absentes ou expirées dans le cache DB", ("alias",))
+CACHE_EXPIRED_ON_READ = counter("oliplus_db_cache_expired_on_read_total", "Lignes expirées lues (non encore purgées)", ("alias",))
+CACHE_BYTES_READ = counter("oliplus_db_cache_read_bytes_total", "Octets de valeurs lus depuis la table de cache", ("alias",))
+CACHE_BYTES_WRITTEN = counter("oliplus_db_cache_written_bytes_total", "Octets de valeurs écrits dans la table de cache", ("alias",))
+CACHE_CULLED_ROWS = counter("oliplus_db_cache_culled_rows_total", "Lignes supprimées par le culling", ("alias",))
+CACHE_OPERATION_SECONDS = histogram(
+    "oliplus_db_cache_operation_seconds",
+    "Durée des opérations du cache DB",
+    ("alias", "operation"),
+)
+
+
+@contextmanager
+def timed(alias: str, operation: str):
+    """⏱️ Mesure la durée d’une opération de cache (succès ou échec)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        CACHE_OPERATION_SECONDS.labels(alias, operation).observe(time.perf_counter() - start)
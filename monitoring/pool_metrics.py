@@ -0,0 +1,30 @@
+from monitoring.prometheus_setup import counter, gauge, histogram
+
+POOL_CONNECTIONS = gauge(
+    "oliplus_db_pool_connections",
+    "Connexions du pool PostgreSQL par état (in_use, idle)",
+    ("pool", "state"),
+)
+POOL_DSN_CONNECTIONS = gauge(
+    "oliplus_db_pool_dsn_connections",
+    "Connexions du pool PostgreSQL par base et par état",
+    ("pool", "database", "state"),
+)
+POOL_WAITERS = gauge("oliplus_db_pool_waiters", "Emprunteurs en attente d’une connexion", ("pool",))
+POOL_CREATED = counter("oliplus_db_pool_created_total", "Connexions ouvertes par le pool", ("pool",))
+POOL_CLOSED = counter("oliplus_db_pool_closed_total", "Connexions fermées par le pool", ("pool",))
+POOL_RESET_FAILURES = counter(
+    "oliplus_db_pool_reset_failures_total",
+    "Échecs de validation (reset ou SELECT 1) au réemploi d’une connexion",
+    ("pool",),
+)
+POOL_LONG_HELD = counter(
+    "oliplus_db_pool_long_held_total",
+    "Connexions signalées comme empruntées trop longtemps (mode debug)",
+    ("pool",),
+)
+POOL_BORROW_SECONDS = histogram(
+    "oliplus_db_pool_borrow_seconds",
+    "Durée d’obtention d’une connexion (attente, ouverture et validation comprises)",
+    ("pool",),
+)
@@ -54,3 +54,44 @@ def delete_prometheus_multiproc_dir(dir_path: Optional[str]) -> None:
 # ⏳ Initialisation automatique + nettoyage à la fermeture du processus
 _prom_dir: str = configure_prometheus_multiproc_dir()
 atexit.register(delete_prometheus_multiproc_dir, _prom_dir)
+
+
+# 📈 Fabriques de métriques : à utiliser après l’initialisation ci-dessus,
+# prometheus_client lisant PROMETHEUS_MULTIPROC_DIR à la création des métriques.
+try:
+    from prometheus_client import Counter, Gauge, Histogram
+except ImportError:  # prometheus-client est optionnel (extra "monitoring")
+    Counter = Gauge = Histogram = None
+
+
+class NoopMetric:
+    """Remplaçant silencieux quand prometheus_client n’est pas installé."""
+
+    def labels(self, *args, **kwargs):
+        return self
+
+    def inc(self, amount: float = 1) -> None:
+        pass
+
+    def dec(self, amount: float = 1) -> None:
+        pass
+
+    def set(self, value: float) -> None:
+        pass
+
+    def observe(self, amount: float) -> None:
+        pass
+
+
+def counter(name: str, documentation: str, labelnames=()):
+    return Counter(name, documentation, labelnames) if Counter else NoopMetric()
+
+
+def histogram(name: str, documentation: str, labelnames=()):
+    return Histogram(name, documentation, labelnames) if Histogram else NoopMetric()
+
+
+def gauge(name: str, documentation: str, labelnames=(), multiprocess_mode: str = "livesum"):
+    if not Gauge:
+        return NoopMetric()
+    return Gauge(name, documentation, labelnames, multiprocess_mode=multiprocess_mode)
@@ -0,0 +1,15 @@
+from monitoring.prometheus_setup import counter, gauge
+
+SESSION_PURGE_DELETED = counter("oliplus_session_purge_deleted_total", "Sessions expirées supprimées par la purge")
+SESSION_PURGE_BATCHES = counter("oliplus_session_purge_batches_total", "Lots de purge de sessions exécutés")
+SESSION_PURGE_CACHE_KEYS = counter("oliplus_session_purge_cache_keys_total", "Clés de cache de sessions purgées")
+SESSION_PURGE_RATE = gauge(
+    "oliplus_session_purge_rows_per_second",
+    "Débit de la purge de sessions en cours",
+    multiprocess_mode="max",
+)
+SESSION_PURGE_LAST_BATCH_TIMESTAMP = gauge(
+    "oliplus_session_purge_progress_timestamp_seconds",
+    "Horodatage du dernier lot de purge terminé",
+    multiprocess_mode="max",
+)
@@ -1,9 +1,14 @@
 from fastapi import FastAPI, UploadFile, Form, File, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from collections import OrderedDict
+from datetime import datetime
 from pathlib import Path
 from modules.document_ingestor import upload_and_parse_document
 from modules.permissions import has_permission_to_upload, has_permission_to_read
-import yaml, os, tempfile, logging
+import yaml, os, tempfile, logging, hashlib, threading, uuid
 
 # 🔧 Logger
 logger = logging.getLogger("cockpit_api")
@@ -14,7 +19,61 @@ logger.addHandler(handler)
 # ⚙️ Config CORS dynamique
 ALLOWED_ORIGINS = os.getenv("CORS_ORIGINS", "*").split(",")
 
-app = FastAPI(title="Cockpit API", version="1.1")
+# 🧵 Traitement en arrière-plan (extraction PyMuPDF liée au CPU : pool de processus)
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+MAX_UPLOAD_BYTES = int(os.getenv("COCKPIT_MAX_UPLOAD_MB", "500")) * 1024 * 1024
+PARSE_WORKERS = int(os.getenv("COCKPIT_PARSE_WORKERS", "2"))
+MAX_PENDING_JOBS = int(os.getenv("COCKPIT_MAX_PENDING_JOBS", "32"))
+MAX_KEPT_JOBS = 1000  # historique des jobs terminés conservé pour /jobs/{id}
+
+_executor = None
+_jobs: "OrderedDict[str, dict]" = OrderedDict()
+_futures: dict = {}  # jobs non terminés
+_jobs_lock = threading.Lock()
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=PARSE_WORKERS)
+    return _executor
+
+def _reset_executor(broken: ProcessPoolExecutor) -> None:
+    """Abandonne un pool cassé (worker tué, OOM…) : le prochain upload en recrée un."""
+    global _executor
+    if _executor is broken:
+        _executor = None
+        broken.shutdown(wait=False, cancel_futures=True)
+        logger.error("Pool de traitement cassé, recréé au prochain upload")
+
+def _parse_job(user: str, pdf_path: str, metadata: dict, sha256: str) -> str:
+    """Exécuté dans un processus du pool ; le fichier temporaire est supprimé dans tous les cas."""
+    try:
+        return upload_and_parse_document(user, Path(pdf_path), metadata, sha256)
+    finally:
+        Path(pdf_path).unlink(missing_ok=True)
+
+def _finish_job(job_id: str, future, executor: ProcessPoolExecutor, pdf_path: Path) -> None:
+    if isinstance(future.exception(), BrokenProcessPool):
+        _reset_executor(executor)
+        pdf_path.unlink(missing_ok=True)  # le worker mort n’a pas pu le supprimer
+    with _jobs_lock:
+        _futures.pop(job_id, None)
+        job = _jobs.get(job_id)
+        if job is None:
+            return
+        job["finished_at"] = datetime.utcnow().isoformat()
+        error = future.exception()
+        if error is None:
+            job.update(status="done", message=future.result())
+            logger.info(f"Traitement réussi : {job['filename']} par {job['user']}")
+        else:
+            job.update(status="failed", error=str(error))
+            logger.error(f"Erreur traitement {job['filename']} : {error}")
+
+def _pending_jobs() -> int:
+    return sum(1 for job in _jobs.values() if job["status"] == "queued")
+
+app = FastAPI(title="Cockpit API", version="1.2")
 
 app.add_middleware(
     CORSMiddleware,
@@ -56,19 +115,78 @@ async def upload_pdf(
     if file.content_type != "application/pdf":
         raise HTTPException(status_code=400, detail="Seuls les fichiers PDF sont autorisés.")
 
-    # 📂 Sauvegarde temporaire
+    with _jobs_lock:
+        if _pending_jobs() >= MAX_PENDING_JOBS:
+            raise HTTPException(status_code=503, detail="File de traitement saturée, réessayez plus tard.")
+
+    # 📂 Sauvegarde temporaire en flux (morceaux de taille fixe), empreinte SHA-256 au passage
+    digest, size = hashlib.sha256(), 0
     with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-        tmp.write(await file.read())
         pdf_path = Path(tmp.name)
+        try:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > MAX_UPLOAD_BYTES:
+                    raise HTTPException(status_code=413, detail="Fichier trop volumineux.")
+                digest.update(chunk)
+                tmp.write(chunk)
+        except BaseException:
+            tmp.close()
+            pdf_path.unlink(missing_ok=True)
+            raise
 
-    # 🧠 Traitement
+    # 🧠 Traitement différé : réponse immédiate avec l’identifiant du job
+    job_id = uuid.uuid4().hex
+    with _jobs_lock:
+        _jobs[job_id] = {
+            "job_id": job_id,
+            "status": "queued",
+            "user": user,
+            "filename": file.filename,
+            "sha256": digest.hexdigest(),
+            "size": size,
+            "submitted_at": datetime.utcnow().isoformat(),
+        }
+        while len(_jobs) > MAX_KEPT_JOBS:
+            oldest = next(iter(_jobs))
+            if _jobs[oldest]["status"] == "queued":
+                break
+            _jobs.popitem(last=False)
+
+    executor = _get_executor()
     try:
-        message = upload_and_parse_document(user, pdf_path, metadata)
-        logger.info(f"Upload réussi : {file.filename} par {user}")
-        return {"status": "success", "message": message}
+        future = executor.submit(_parse_job, user, str(pdf_path), metadata, digest.hexdigest())
     except Exception as e:
-        logger.error(f"Erreur upload : {e}")
-        raise HTTPException(status_code=400, detail=str(e))
+        if isinstance(e, BrokenProcessPool):
+            _reset_executor(executor)
+        pdf_path.unlink(missing_ok=True)
+        with _jobs_lock:
+            _jobs[job_id].update(status="failed", error=str(e), finished_at=datetime.utcnow().isoformat())
+        logger.error(f"Soumission impossible pour {file.filename} : {e}")
+        raise HTTPException(status_code=503, detail="Traitement indisponible, réessayez plus tard.")
+    with _jobs_lock:
+        if not future.done():
+            _futures[job_id] = future
+    future.add_done_callback(lambda f: _finish_job(job_id, f, executor, pdf_path))
+
+    logger.info(f"Upload reçu : {file.filename} par {user} (job {job_id})")
+    return JSONResponse(
+        status_code=202,
+        content={"status": "queued", "job_id": job_id, "sha256": _jobs[job_id]["sha256"]},
+    )
+
+# ⏳ Suivi des traitements
+@app.get("/jobs/{job_id}", summary="Statut d’un traitement", description="Suivre le traitement d’un document uploadé")
+def get_job(job_id: str):
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Job inconnu")
+        job = dict(job)
+        future = _futures.get(job_id)
+    if job["status"] == "queued" and future is not None and future.running():
+        job["status"] = "running"
+    return job
 
 # 📦 Endpoint pour consulter les métadonnées archivées
 @app.get("/archive/{title}", summary="Lire archive", description="Consulter les métadonnées archivées d’un document")
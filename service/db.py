@@ -2,6 +2,10 @@ import os
 import time
 import threading
 import logging
+import re
+import traceback
+import uuid
+from collections import OrderedDict, deque
 from werkzeug import urls
 import psycopg2
 import psycopg2.extensions
@@ -10,125 +14,541 @@ from psycopg2.pool import PoolError
 import odoo
 from .cursor import Cursor  # Assure-toi que Cursor est bien défini dans cursor.py
 from . import tools
+from monitoring.pool_metrics import (
+    POOL_BORROW_SECONDS, POOL_CLOSED, POOL_CONNECTIONS, POOL_CREATED, POOL_DSN_CONNECTIONS,
+    POOL_LONG_HELD, POOL_RESET_FAILURES, POOL_WAITERS,
+)
 
 _logger = logging.getLogger(__name__)
 _logger_conn = _logger.getChild("connection")
 
 MAX_IDLE_TIMEOUT = 600  # 10 minutes
+REAP_INTERVAL = 60  # période du thread de nettoyage des connexions inactives
+ACQUIRE_TIMEOUT = 5.0  # attente maximale d’une connexion quand le pool est plein
+VALIDATION_IDLE_AGE = 30  # au-delà, une connexion propre est testée (SELECT 1) avant réemploi
+MAX_LIFETIME = 3600  # durée de vie maximale d’une connexion (0 : illimitée)
+MAX_USES = 0  # nombre maximal d’emprunts d’une connexion (0 : illimité)
+HELD_THRESHOLD = 30  # mode debug : durée d’emprunt au-delà de laquelle une connexion est signalée
+REPLICA_MAX_LAG = 30  # retard de rejeu au-delà duquel un réplica est écarté (secondes)
+REPLICA_CHECK_INTERVAL = 10  # période de mesure du retard d’un réplica
+REPLICA_PROBE_TIMEOUT = 2  # connect_timeout de la connexion de mesure (minimum libpq : 2 s)
+STREAM_ITERSIZE = 2000  # lignes rapatriées par aller-retour par les curseurs côté serveur
+PREPARED_CACHE_SIZE = 0  # requêtes préparées conservées par connexion (0 : désactivé)
+
+_POSITIONAL_PARAM = re.compile(r'%(%|s)')
+
+
+def _dsn_key(dsn) -> tuple:
+    """
+    Clé normalisée d’un DSN (dict de connexion ou chaîne libpq), mot de passe exclu.
+    Calculée une fois par emprunt ; les connexions du pool la conservent.
+    """
+    alias_keys = {'dbname': 'database'}
+    items = psycopg2.extensions.parse_dsn(dsn) if isinstance(dsn, str) else dsn
+    return tuple(sorted(
+        (alias_keys.get(k, k), str(v)) for k, v in items.items() if k != 'password'
+    ))
+
+
+def _dsn_label(key: tuple) -> str:
+    """Libellé d’un DSN normalisé pour les statistiques : le nom de base, à défaut la chaîne libpq."""
+    items = dict(key)
+    return items.get('database') or items.get('dsn', '?')
+
+
+class _PooledConnection:
+    __slots__ = ('cnx', 'key', 'last_used', 'created_at', 'uses', 'clean', 'borrowed_at', 'stack', 'flagged')
+
+    def __init__(self, cnx, key: tuple):
+        self.cnx = cnx
+        self.key = key
+        self.last_used = 0.0
+        self.created_at = time.time()
+        self.uses = 1
+        self.clean = False  # rendue hors transaction (statut IDLE) : pas de reset au prochain emprunt
+        self.borrowed_at = 0.0
+        self.stack = None
+        self.flagged = False
+
+
+class _Waiter:
+    """Emprunteur en attente : reçoit soit une connexion rendue, soit une place pour en ouvrir une."""
+    __slots__ = ('key', 'event', 'entry', 'slot', 'since')
+
+    def __init__(self, key: tuple):
+        self.key = key
+        self.event = threading.Event()
+        self.entry = None
+        self.slot = False
+        self.since = time.monotonic()
+
 
 class ConnectionPool:
-    def __init__(self, maxconn: int = 64, readonly: bool = False):
-        self._connections = []
+    """
+    Pool de connexions psycopg2 indexé par DSN normalisé.
+
+    Les connexions inactives sont rangées par DSN dans des piles (LIFO : la plus
+    récemment rendue, donc la plus « chaude », est réutilisée en premier) ; emprunt et
+    restitution sont en O(1). La fermeture des connexions inactives depuis plus de
+    MAX_IDLE_TIMEOUT est confiée à un thread de nettoyage.
+
+    Pool plein : les emprunteurs attendent dans une file FIFO jusqu’à ``acquire_timeout``
+    secondes ; ``give_back`` remet directement la connexion au plus ancien d’entre eux.
+
+    Validation au réemploi : une connexion rendue hors transaction n’est pas réinitialisée
+    (les paramètres de session posés par l’emprunteur précédent sont conservés) ; si elle est
+    restée inactive plus de ``validation_idle_age`` secondes, un ``SELECT 1`` vérifie qu’elle
+    est vivante. Les autres passent par ``reset()``. Les connexions sont fermées au retour
+    au-delà de ``max_lifetime`` secondes ou de ``max_uses`` emprunts.
+
+    Requêtes préparées : chaque connexion ouverte garde jusqu’à ``prepared_cache_size``
+    requêtes préparées (voir ``PsycoConnection.execute_prepared``).
+
+    Observabilité : ``stats()`` et les métriques de monitoring/pool_metrics.py. En mode
+    ``debug``, la pile d’appel de chaque emprunt est conservée et le thread de nettoyage
+    signale les connexions empruntées depuis plus de ``held_threshold`` secondes.
+    """
+
+    def __init__(self, maxconn: int = 64, readonly: bool = False, acquire_timeout: float = ACQUIRE_TIMEOUT,
+                 validation_idle_age: float = VALIDATION_IDLE_AGE, max_lifetime: float = MAX_LIFETIME,
+                 max_uses: int = MAX_USES, debug: bool = False, held_threshold: float = HELD_THRESHOLD,
+                 prepared_cache_size: int = PREPARED_CACHE_SIZE):
+        self._idle: dict[tuple, deque] = {}
+        self._idle_count = 0
+        self._in_use: dict = {}
+        self._opening = 0
+        self._waiters: deque = deque()
         self._maxconn = max(1, maxconn)
         self._readonly = readonly
+        self._acquire_timeout = acquire_timeout
+        self._validation_idle_age = validation_idle_age
+        self._max_lifetime = max_lifetime
+        self._max_uses = max_uses
+        self._prepared_cache_size = prepared_cache_size
         self._lock = threading.Lock()
+        self._reaper = None
+        self._wait_stats = {'waits': 0, 'wait_time': 0.0, 'timeouts': 0, 'max_queue_depth': 0}
+        self._counters = {'created': 0, 'closed': 0, 'reset_failures': 0, 'long_held': 0}
+        self._debug_mode = debug
+        self._held_threshold = held_threshold
+        self._reap_interval = max(1.0, min(REAP_INTERVAL, held_threshold / 2)) if debug else REAP_INTERVAL
+        self._label = 'ro' if readonly else 'rw'
+        self._dsn_labels: set = set()
 
     def __repr__(self):
-        used = sum(1 for c, u, _ in self._connections if u)
-        total = len(self._connections)
+        used = len(self._in_use)
+        total = used + self._idle_count
         mode = 'read-only' if self._readonly else 'read/write'
-        return f"ConnectionPool({mode};used={used}/total={total}/max={self._maxconn})"
+        return f"ConnectionPool({mode};used={used}/total={total}/max={self._maxconn};waiting={len(self._waiters)})"
 
     @property
     def readonly(self):
         return self._readonly
 
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    @property
+    def wait_stats(self) -> dict:
+        return dict(self._wait_stats)
+
+    def stats(self) -> dict:
+        """📊 Instantané de l’état du pool, avec le détail par base de données."""
+        with self._lock:
+            now = time.time()
+            return {
+                'readonly': self._readonly,
+                'maxconn': self._maxconn,
+                'in_use': len(self._in_use),
+                'idle': self._idle_count,
+                'opening': self._opening,
+                'waiters': len(self._waiters),
+                'oldest_borrow_age': max((now - e.borrowed_at for e in self._in_use.values()), default=0.0),
+                **self._counters,
+                **self._wait_stats,
+                'per_dsn': self._per_dsn(),
+            }
+
+    def _per_dsn(self) -> dict:
+        """Nombre de connexions empruntées / inactives par base (verrou détenu)."""
+        per_dsn = {}
+        for entry in self._in_use.values():
+            per_dsn.setdefault(_dsn_label(entry.key), {'in_use': 0, 'idle': 0})['in_use'] += 1
+        for key, idle in self._idle.items():
+            if idle:
+                per_dsn.setdefault(_dsn_label(key), {'in_use': 0, 'idle': 0})['idle'] += len(idle)
+        return per_dsn
+
+    def held_connections(self, older_than: float = 0.0) -> list[dict]:
+        """Connexions empruntées depuis plus de ``older_than`` secondes (pile d’appel en mode debug)."""
+        now = time.time()
+        with self._lock:
+            return [
+                {'dsn': _dsn_label(e.key), 'held_for': now - e.borrowed_at, 'stack': e.stack}
+                for e in self._in_use.values() if now - e.borrowed_at >= older_than
+            ]
+
+    def _publish_gauges(self):
+        POOL_CONNECTIONS.labels(self._label, 'in_use').set(len(self._in_use))
+        POOL_CONNECTIONS.labels(self._label, 'idle').set(self._idle_count)
+        POOL_WAITERS.labels(self._label).set(len(self._waiters))
+
     def _debug(self, msg, *args):
         _logger_conn.debug(('%r ' + msg), self, *args)
 
-    @tools.locked
-    def borrow(self, connection_info: dict) -> psycopg2.extensions.connection:
-        for i, (cnx, used, last_used) in tools.reverse_enumerate(self._connections):
-            if not used and not cnx.closed and time.time() - last_used > MAX_IDLE_TIMEOUT:
-                self._debug('Closing idle connection at index %d: %r', i, cnx.dsn)
-                cnx.close()
-            if cnx.closed:
-                self._connections.pop(i)
-                self._debug('Removing closed connection at index %d: %r', i, cnx.dsn)
-                continue
-            if getattr(cnx, 'leaked', False):
-                delattr(cnx, 'leaked')
-                self._connections[i][1] = False
-                _logger.info('%r: Recovered leaked connection to %r', self, cnx.dsn)
-
-        for i, (cnx, used, _) in enumerate(self._connections):
-            if not used and self._dsn_equals(cnx.dsn, connection_info):
-                try:
-                    cnx.reset()
-                except psycopg2.OperationalError:
-                    self._debug('Reset failed at index %d: %r', i, cnx.dsn)
-                    if not cnx.closed:
-                        cnx.close()
+    def _total(self) -> int:
+        return len(self._in_use) + self._idle_count + self._opening
+
+    def borrow(self, connection_info: dict, timeout: float = None) -> psycopg2.extensions.connection:
+        started = time.monotonic()
+        key = _dsn_key(connection_info)
+        deadline = started + (self._acquire_timeout if timeout is None else timeout)
+        while True:
+            entry = self._reserve(key, deadline)
+            if entry is None:
+                entry = self._open(key, connection_info)
+                break
+            if self._prepare(entry):
+                self._debug('Borrowed existing connection to %r', entry.cnx.dsn)
+                break
+            self._discard(entry)
+
+        entry.borrowed_at = time.time()
+        entry.flagged = False
+        if self._debug_mode:
+            entry.stack = ''.join(traceback.format_stack(limit=16)[:-1])
+        POOL_BORROW_SECONDS.labels(self._label).observe(time.monotonic() - started)
+        self._publish_gauges()
+        return entry.cnx
+
+    def _reserve(self, key: tuple, deadline: float):
+        """
+        Réserve une connexion inactive (retournée) ou une place pour en ouvrir une (None).
+        Attend son tour dans la file si le pool est plein.
+        """
+        with self._lock:
+            self._ensure_reaper()
+            self._grant_slots()
+            idle = self._idle.get(key)
+            while idle:
+                entry = idle.pop()
+                self._idle_count -= 1
+                if entry.cnx.closed:
+                    self._debug('Removing closed connection: %r', entry.cnx.dsn)
                     continue
-                self._connections[i][1] = True
-                self._debug('Borrowed existing connection to %r at index %d', cnx.dsn, i)
-                return cnx
-
-        if len(self._connections) >= self._maxconn:
-            for i, (cnx, used, _) in enumerate(self._connections):
-                if not used:
-                    self._connections.pop(i)
-                    if not cnx.closed:
-                        cnx.close()
-                    self._debug('Removed old connection at index %d: %r', i, cnx.dsn)
-                    break
-            else:
-                raise PoolError('Connection pool is full')
-
+                self._in_use[entry.cnx] = entry
+                return entry
+            if not self._waiters and (self._total() < self._maxconn or self._evict_oldest_idle()):
+                self._opening += 1
+                return None
+
+            waiter = _Waiter(key)
+            self._waiters.append(waiter)
+            self._wait_stats['waits'] += 1
+            self._wait_stats['max_queue_depth'] = max(self._wait_stats['max_queue_depth'], len(self._waiters))
+            POOL_WAITERS.labels(self._label).set(len(self._waiters))
+
+        waiter.event.wait(max(0.0, deadline - time.monotonic()))
+
+        with self._lock:
+            waited = time.monotonic() - waiter.since
+            self._wait_stats['wait_time'] += waited
+            if waiter.entry is None and not waiter.slot:
+                self._waiters.remove(waiter)
+                self._wait_stats['timeouts'] += 1
+                raise PoolError(f'Connection pool is full (no connection available after {waited:.2f}s)')
+        self._debug('Waited %.3fs for a connection', waited)
+        return waiter.entry
+
+    def _grant_slots(self):
+        """Attribue les places libres aux plus anciens emprunteurs en attente (verrou détenu)."""
+        while self._waiters and self._total() < self._maxconn:
+            waiter = self._waiters.popleft()
+            waiter.slot = True
+            self._opening += 1
+            waiter.event.set()
+
+    def _open(self, key: tuple, connection_info: dict):
         try:
             result = psycopg2.connect(connection_factory=PsycoConnection, **connection_info)
         except psycopg2.Error:
+            with self._lock:
+                self._opening -= 1
+                self._grant_slots()
             _logger.info('Connection to database failed')
             raise
 
-        self._connections.append([result, True, 0])
+        result.prepared_cache_size = self._prepared_cache_size
+        entry = _PooledConnection(result, key)
+        with self._lock:
+            self._opening -= 1
+            self._in_use[result] = entry
+            self._counters['created'] += 1
+        POOL_CREATED.labels(self._label).inc()
         self._debug('Created new connection backend PID %d', result.get_backend_pid())
-        return result
+        return entry
+
+    def _prepare(self, entry: _PooledConnection) -> bool:
+        """Valide une connexion réutilisée, hors verrou du pool ; False si elle est inutilisable."""
+        if self._expired(entry):
+            self._debug('Recycling connection: %r', entry.cnx.dsn)
+            return False
+        cnx = entry.cnx
+        clean, entry.clean = entry.clean, False
+        entry.uses += 1
+        try:
+            if not clean:
+                cnx.reset()
+            elif time.time() - entry.last_used >= self._validation_idle_age:
+                self._ping(cnx)
+        except psycopg2.OperationalError:
+            self._debug('Validation failed: %r', cnx.dsn)
+            with self._lock:
+                self._counters['reset_failures'] += 1
+            POOL_RESET_FAILURES.labels(self._label).inc()
+            return False
+        return True
+
+    @staticmethod
+    def _restore_session(cnx) -> bool:
+        """
+        Connexion rendue hors transaction : remet côté client les réglages de session psycopg2
+        (autocommit, readonly, isolation, deferrable) modifiés par l’emprunteur. Hors transaction,
+        set_session ne fait que mémoriser les valeurs : pas d’aller-retour serveur.
+        Retourne False si la connexion doit passer par reset() au prochain emprunt.
+        """
+        if cnx.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            return False
+        try:
+            cnx.set_session(isolation_level='DEFAULT', readonly='DEFAULT', deferrable='DEFAULT', autocommit=False)
+        except psycopg2.Error:
+            return False
+        return True
+
+    @staticmethod
+    def _ping(cnx):
+        """``SELECT 1`` en autocommit : ne laisse pas de transaction ouverte."""
+        autocommit = cnx.autocommit
+        cnx.autocommit = True
+        try:
+            with cnx.cursor() as cr:
+                cr.execute('SELECT 1')
+        finally:
+            if not cnx.closed:
+                cnx.autocommit = autocommit
+
+    def _expired(self, entry: _PooledConnection) -> bool:
+        return bool(
+            (self._max_lifetime and time.time() - entry.created_at >= self._max_lifetime)
+            or (self._max_uses and entry.uses >= self._max_uses)
+        )
+
+    def _discard(self, entry: _PooledConnection):
+        with self._lock:
+            self._in_use.pop(entry.cnx, None)
+            self._counters['closed'] += 1
+            self._grant_slots()
+        self._close(entry.cnx)
+
+    def _close(self, cnx):
+        """Ferme ``cnx`` ; le compteur ``closed`` est tenu par l’appelant, sous verrou."""
+        if not cnx.closed:
+            cnx.close()
+        POOL_CLOSED.labels(self._label).inc()
+
+    def _evict_oldest_idle(self) -> bool:
+        """Ferme la connexion inactive la plus ancienne, tous DSN confondus, pour libérer une place."""
+        oldest = None
+        for idle in self._idle.values():
+            if idle and (oldest is None or idle[0].last_used < oldest[0].last_used):
+                oldest = idle
+        if oldest is None:
+            return False
+        entry = oldest.popleft()
+        self._idle_count -= 1
+        self._counters['closed'] += 1
+        self._close(entry.cnx)
+        self._debug('Removed old connection: %r', entry.cnx.dsn)
+        return True
 
     @tools.locked
     def give_back(self, connection, keep_in_pool=True):
         self._debug('Returning connection to %r', connection.dsn)
-        for i, (cnx, _, _) in enumerate(self._connections):
-            if cnx is connection:
-                if keep_in_pool:
-                    self._connections[i][1] = False
-                    self._connections[i][2] = time.time()
-                    self._debug('Connection returned to pool: %r', cnx.dsn)
-                else:
-                    self._connections.pop(i)
-                    self._debug('Connection removed from pool: %r', cnx.dsn)
-                    cnx.close()
+        entry = self._in_use.pop(connection, None)
+        if entry is None:
+            raise PoolError('Connection does not belong to pool')
+
+        self._release(entry, keep_in_pool)
+        self._publish_gauges()
+
+    def _release(self, entry: _PooledConnection, keep_in_pool: bool):
+        """Remet une connexion au plus ancien emprunteur en attente, dans le pool ou la ferme (verrou détenu)."""
+        connection = entry.cnx
+        entry.stack = None
+        if keep_in_pool and not connection.closed and not self._expired(entry):
+            entry.last_used = time.time()
+            entry.clean = self._restore_session(connection)
+            if self._waiters and self._waiters[0].key == entry.key:
+                # Remise directe au plus ancien emprunteur en attente.
+                waiter = self._waiters.popleft()
+                self._in_use[connection] = entry
+                waiter.entry = entry
+                waiter.event.set()
+                self._debug('Connection handed over to waiting borrower: %r', connection.dsn)
+                return
+            if not self._waiters:
+                self._idle.setdefault(entry.key, deque()).append(entry)
+                self._idle_count += 1
+                self._debug('Connection returned to pool: %r', connection.dsn)
                 return
-        raise PoolError('Connection does not belong to pool')
+
+        # Connexion retirée (ou attendue pour un autre DSN) : sa place revient à la file.
+        self._debug('Connection removed from pool: %r', connection.dsn)
+        self._counters['closed'] += 1
+        self._close(connection)
+        self._grant_slots()
 
     @tools.locked
     def close_all(self, dsn=None):
-        count = 0
-        last = None
-        for i, (cnx, _, _) in tools.reverse_enumerate(self._connections):
-            if dsn is None or self._dsn_equals(cnx.dsn, dsn):
-                cnx.close()
-                last = self._connections.pop(i)[0]
-                count += 1
-        if count:
-            _logger.info('%r: Closed %d connections %s', self, count,
-                         (dsn and last and f'to {last.dsn}') or '')
-
-    def _dsn_equals(self, dsn1, dsn2):
-        alias_keys = {'dbname': 'database'}
-        ignore_keys = ['password']
-        dsn1, dsn2 = ({
-            alias_keys.get(k, k): str(v)
-            for k, v in (psycopg2.extensions.parse_dsn(dsn) if isinstance(dsn, str) else dsn).items()
-            if k not in ignore_keys
-        } for dsn in (dsn1, dsn2))
-        return dsn1 == dsn2
+        key = None if dsn is None else _dsn_key(dsn)
+        closed = []
+        for idle_key in list(self._idle):
+            if key is None or idle_key == key:
+                closed.extend(entry.cnx for entry in self._idle.pop(idle_key))
+        self._idle_count = sum(len(idle) for idle in self._idle.values())
+        for cnx, entry in list(self._in_use.items()):
+            if key is None or entry.key == key:
+                closed.append(self._in_use.pop(cnx).cnx)
+        self._counters['closed'] += len(closed)
+        for cnx in closed:
+            self._close(cnx)
+        self._grant_slots()
+        self._publish_gauges()
+        if closed:
+            _logger.info('%r: Closed %d connections %s', self, len(closed),
+                         (dsn and f'to {closed[-1].dsn}') or '')
+
+    # 🧹 Nettoyage en arrière-plan
+
+    def _ensure_reaper(self):
+        if self._reaper is None:
+            self._reaper = threading.Thread(target=self._reap_loop, name='db-pool-reaper', daemon=True)
+            self._reaper.start()
+
+    def _reap_loop(self):
+        while True:
+            time.sleep(self._reap_interval)
+            try:
+                self.reap()
+            except Exception:
+                _logger.exception('%r: idle connection reaping failed', self)
+
+    def reap(self):
+        """
+        Ferme les connexions inactives depuis plus de MAX_IDLE_TIMEOUT et récupère
+        les connexions marquées ``leaked`` (curseur non fermé). Les fermetures ont lieu hors verrou.
+        """
+        expired, long_held = [], []
+        with self._lock:
+            now = time.time()
+            deadline = now - MAX_IDLE_TIMEOUT
+            for key, idle in list(self._idle.items()):
+                while idle and idle[0].last_used < deadline:
+                    expired.append(idle.popleft().cnx)
+                    self._idle_count -= 1
+                if not idle:
+                    del self._idle[key]
+
+            for cnx, entry in list(self._in_use.items()):
+                if getattr(cnx, 'leaked', False):
+                    delattr(cnx, 'leaked')
+                    del self._in_use[cnx]
+                    self._release(entry, keep_in_pool=True)
+                    _logger.info('%r: Recovered leaked connection to %r', self, cnx.dsn)
+                elif self._debug_mode and not entry.flagged and now - entry.borrowed_at >= self._held_threshold:
+                    entry.flagged = True
+                    long_held.append((entry.cnx.dsn, now - entry.borrowed_at, entry.stack))
+
+            self._grant_slots()
+            self._counters['long_held'] += len(long_held)
+            self._counters['closed'] += len(expired)
+            per_dsn = self._per_dsn()
+            self._publish_gauges()
+
+        # Les bases disparues depuis le dernier passage sont remises à zéro.
+        for database in self._dsn_labels - per_dsn.keys():
+            per_dsn[database] = {'in_use': 0, 'idle': 0}
+        self._dsn_labels = {database for database, counts in per_dsn.items() if any(counts.values())}
+        for database, counts in per_dsn.items():
+            for state, count in counts.items():
+                POOL_DSN_CONNECTIONS.labels(self._label, database, state).set(count)
+        for dsn, held_for, stack in long_held:
+            POOL_LONG_HELD.labels(self._label).inc()
+            _logger.warning('%r: connection to %r held for %.0fs, borrowed at:\n%s',
+                            self, dsn, held_for, stack or '(stack unavailable)')
+
+        for cnx in expired:
+            self._debug('Closing idle connection: %r', cnx.dsn)
+            self._close(cnx)
 
 
 class PsycoConnection(psycopg2.extensions.connection):
+    prepared_cache_size = PREPARED_CACHE_SIZE
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._prepared: OrderedDict = OrderedDict()
+
     def lobject(*args, **kwargs):
         pass
 
+    def reset(self):
+        super().reset()
+        self._deallocate_all()
+
+    def _deallocate_all(self):
+        """
+        reset() n’envoie qu’un ROLLBACK (pas de DISCARD ALL) : les requêtes préparées
+        survivraient côté serveur à la purge du cache et s’accumuleraient sur la connexion.
+        """
+        if not self._prepared:
+            return
+        autocommit = self.autocommit
+        self.autocommit = True
+        try:
+            with self.cursor() as cr:
+                cr.execute('DEALLOCATE ALL')
+        finally:
+            self.autocommit = autocommit
+        self._prepared.clear()
+
+    def execute_prepared(self, cr, query: str, params: tuple = ()):
+        """
+        Exécute ``query`` via une requête préparée gardée en cache LRU sur la connexion :
+        le plan n’est calculé qu’une fois par connexion. Seuls les paramètres positionnels
+        (``%s``) sont pris en charge ; sinon, ou cache désactivé, exécution classique.
+        """
+        if not self.prepared_cache_size or '%(' in query or not isinstance(params, (tuple, list)):
+            return cr.execute(query, params or None)
+
+        name = self._prepared.get(query)
+        if name is None:
+            if len(self._prepared) >= self.prepared_cache_size:
+                _, evicted = self._prepared.popitem(last=False)
+                cr.execute(f'DEALLOCATE {evicted}')
+            counter = iter(range(1, len(params) + 1))
+            body = _POSITIONAL_PARAM.sub(lambda m: '%' if m.group(1) == '%' else f'${next(counter)}', query)
+            name = f'odoo_stmt_{uuid.uuid4().hex[:16]}'
+            cr.execute(f'PREPARE {name} AS {body}')  # sans paramètres : texte transmis tel quel
+            self._prepared[query] = name
+        else:
+            self._prepared.move_to_end(query)
+
+        if not params:
+            return cr.execute(f'EXECUTE {name}')
+        return cr.execute(f'EXECUTE {name} ({", ".join(["%s"] * len(params))})', params)
+
     if hasattr(psycopg2.extensions, 'ConnectionInfo'):
         @property
         def info(self):
@@ -159,10 +579,97 @@ class Connection:
         _logger.debug('Creating cursor for %r', self.dsn)
         return Cursor(self.__pool, self.__dbname, self.__dsn)
 
+    def stream_cursor(self, itersize: int = STREAM_ITERSIZE) -> 'StreamingCursor':
+        _logger.debug('Creating server-side cursor for %r', self.dsn)
+        return StreamingCursor(self.__pool, self.__dsn, itersize)
+
+    def stream(self, query: str, params=None, itersize: int = STREAM_ITERSIZE):
+        """Itère sur les lignes de ``query`` en mémoire constante (curseur nommé côté serveur)."""
+        with self.stream_cursor(itersize) as cr:
+            cr.execute(query, params)
+            yield from cr
+
+    def fetch_prepared(self, query: str, params: tuple = ()) -> list:
+        """
+        Lignes d’une lecture courte et fréquente, exécutée en requête préparée sur la connexion
+        empruntée (``PsycoConnection.execute_prepared``) ; la transaction est annulée au retour.
+        """
+        cnx = self.__pool.borrow(self.__dsn)
+        try:
+            with cnx.cursor() as cr:
+                cnx.execute_prepared(cr, query, params)
+                rows = cr.fetchall()
+            cnx.rollback()
+        except psycopg2.Error:
+            self.__pool.give_back(cnx, keep_in_pool=False)
+            raise
+        self.__pool.give_back(cnx)
+        return rows
+
     def __bool__(self):
         raise NotImplementedError()
 
 
+class StreamingCursor:
+    """
+    📤 Curseur nommé côté serveur pour les grosses lectures (exports, tableaux de bord).
+
+    Les lignes sont rapatriées par paquets de ``itersize`` au fil de l’itération ; la
+    mémoire du worker reste constante quelle que soit la taille du résultat. La connexion
+    est empruntée au pool pour la durée du bloc ``with`` et la transaction (lecture seule)
+    est annulée à la sortie.
+    """
+
+    def __init__(self, pool: ConnectionPool, dsn: dict, itersize: int = STREAM_ITERSIZE):
+        self._pool = pool
+        self._dsn = dsn
+        self.itersize = itersize
+        self._cnx = None
+        self._cr = None
+
+    def __enter__(self):
+        self._cnx = self._pool.borrow(self._dsn)
+        self._cr = self._cnx.cursor(name=f'odoo_stream_{uuid.uuid4().hex[:16]}')
+        self._cr.itersize = self.itersize
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def execute(self, query: str, params=None):
+        self._cr.execute(query, params)
+
+    @property
+    def description(self):
+        return self._cr.description
+
+    def __iter__(self):
+        return iter(self._cr)
+
+    def iter_batches(self, size: int = None):
+        """Lignes par listes de ``size`` (``itersize`` par défaut), pour les traitements par lot."""
+        size = size or self.itersize
+        while True:
+            rows = self._cr.fetchmany(size)
+            if not rows:
+                return
+            yield rows
+
+    def close(self):
+        if self._cnx is None:
+            return
+        cnx, self._cnx = self._cnx, None
+        try:
+            if not cnx.closed:
+                self._cr.close()
+                cnx.rollback()
+        except psycopg2.Error:
+            _logger.warning('Failed to close server-side cursor on %r', cnx.dsn, exc_info=True)
+        finally:
+            self._cr = None
+            self._pool.give_back(cnx, keep_in_pool=not cnx.closed)
+
+
 def connection_info_for(db_or_uri: str, readonly: bool = False) -> tuple[str, dict]:
     if 'ODOO_PGAPPNAME' in os.environ:
         app_name = os.environ['ODOO_PGAPPNAME'].replace('{pid}', str(os.getpid()))[:63]
@@ -185,20 +692,210 @@ def connection_info_for(db_or_uri: str, readonly: bool = False) -> tuple[str, di
     return db_or_uri, connection_info
 
 
+class _Replica:
+    __slots__ = ('host', 'port', 'weight', 'current', 'healthy', 'lag', 'checked_at')
+
+    def __init__(self, host: str, port, weight: int):
+        self.host = host
+        self.port = port
+        self.weight = max(1, weight)
+        self.current = 0
+        self.healthy = True
+        self.lag = 0.0
+        self.checked_at = 0.0
+
+    def __repr__(self):
+        return f"Replica({self.host}:{self.port or ''};weight={self.weight};lag={self.lag:.1f}s)"
+
+
+class ReplicaRouter:
+    """
+    🔀 Répartit les curseurs en lecture seule entre réplicas, en round-robin pondéré.
+
+    Le retard de rejeu de chaque réplica est mesuré au plus toutes les ``check_interval``
+    secondes (à l’emprunt, par l’appelant qui trouve la mesure périmée), sur une connexion
+    dédiée hors pool ouverte avec ``connect_timeout=probe_timeout`` : un pool saturé n’écarte
+    pas un réplica sain et un hôte injoignable ne bloque pas l’appelant au-delà de ce délai.
+    Un réplica en retard de plus de ``max_lag`` secondes, ou injoignable, est écarté jusqu’à
+    la mesure suivante ; sans réplica sain, la lecture part sur le primaire.
+
+    Adhérence optionnelle (``sticky_seconds``) : après ``note_write(clé)``, les lectures
+    ``db_connect(..., readonly=True, sticky_key=clé)`` restent sur le primaire pendant ce délai,
+    pour qu’une session relise ses propres écritures.
+    """
+
+    def __init__(self, replicas: list, max_lag: float = REPLICA_MAX_LAG,
+                 check_interval: float = REPLICA_CHECK_INTERVAL, sticky_seconds: float = 0,
+                 probe_timeout: float = REPLICA_PROBE_TIMEOUT):
+        self.replicas = replicas
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.probe_timeout = probe_timeout
+        self.sticky_seconds = sticky_seconds
+        self._writes: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f"ReplicaRouter({self.replicas!r})"
+
+    def note_write(self, key) -> None:
+        if not self.sticky_seconds or key is None:
+            return
+        now = time.monotonic()
+        with self._lock:
+            self._writes.pop(key, None)
+            self._writes[key] = now + self.sticky_seconds
+            while self._writes and next(iter(self._writes.values())) <= now:
+                self._writes.popitem(last=False)
+
+    def is_sticky(self, key) -> bool:
+        if not self.sticky_seconds or key is None:
+            return False
+        with self._lock:
+            return self._writes.get(key, 0) > time.monotonic()
+
+    def choose(self, connection_info: dict):
+        """Réplica sain suivant (round-robin pondéré lissé), ou None pour le primaire."""
+        now = time.monotonic()
+        for replica in self.replicas:
+            if now - replica.checked_at >= self.check_interval:
+                self._check(replica, connection_info)
+
+        with self._lock:
+            healthy = [replica for replica in self.replicas if replica.healthy]
+            if not healthy:
+                return None
+            total = sum(replica.weight for replica in healthy)
+            for replica in healthy:
+                replica.current += replica.weight
+            chosen = max(healthy, key=lambda replica: replica.current)
+            chosen.current -= total
+            return chosen
+
+    def _check(self, replica: _Replica, connection_info: dict):
+        with self._lock:
+            if time.monotonic() - replica.checked_at < self.check_interval:
+                return
+            replica.checked_at = time.monotonic()  # un seul appelant mesure
+
+        cnx = None
+        try:
+            info = self.connection_info(replica, connection_info)
+            cnx = psycopg2.connect(**info, connect_timeout=int(self.probe_timeout))
+            cnx.autocommit = True
+            with cnx.cursor() as cr:
+                # Rejeu à jour : pas de retard, même si la dernière transaction date.
+                cr.execute("""
+                    SELECT CASE
+                        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+                        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+                    END
+                """)
+                replica.lag = float(cr.fetchone()[0])
+            healthy = replica.lag <= self.max_lag
+        except psycopg2.Error:
+            _logger.warning('%r unreachable, reads fall back to other replicas or primary', replica, exc_info=True)
+            healthy = False
+        finally:
+            if cnx is not None:
+                cnx.close()
+
+        if healthy != replica.healthy:
+            _logger.warning('%r %s', replica, 'back in rotation' if healthy else 'ejected (lag or error)')
+        replica.healthy = healthy
+
+    @staticmethod
+    def connection_info(replica: _Replica, connection_info: dict) -> dict:
+        info = dict(connection_info, host=replica.host)
+        if replica.port:
+            info['port'] = replica.port
+        return info
+
+
+def _replicas_from_config() -> list:
+    """
+    Réplicas déclarés dans ``db_replica_host`` (liste séparée par des virgules), avec
+    ``db_replica_port`` et ``db_replica_weights`` alignés (ou une valeur unique pour tous).
+    """
+    hosts = [h.strip() for h in str(tools.config.get('db_replica_host') or '').split(',') if h.strip()]
+
+    def aligned(option, default):
+        values = [v.strip() for v in str(tools.config.get(option) or '').split(',') if v.strip()]
+        if len(values) == 1:
+            values *= len(hosts)
+        return values if len(values) == len(hosts) else [default] * len(hosts)
+
+    ports = aligned('db_replica_port', None)
+    weights = aligned('db_replica_weights', 1)
+    return [_Replica(host, port, int(weight)) for host, port, weight in zip(hosts, ports, weights)]
+
+
 _Pool = None
 _Pool_readonly = None
-
-def db_connect(to: str, allow_uri: bool = False, readonly: bool = False) -> Connection:
+_Router = None
+
+
+def replica_router():
+    """Routeur de réplicas construit depuis la configuration, ou None sans réplica déclaré."""
+    global _Router
+    if _Router is None:
+        replicas = _replicas_from_config()
+        if not replicas:
+            return None
+        _Router = ReplicaRouter(
+            replicas,
+            max_lag=float(tools.config.get('db_replica_max_lag', REPLICA_MAX_LAG)),
+            check_interval=float(tools.config.get('db_replica_check_interval', REPLICA_CHECK_INTERVAL)),
+            sticky_seconds=float(tools.config.get('db_replica_sticky_seconds', 0)),
+            probe_timeout=float(tools.config.get('db_replica_probe_timeout', REPLICA_PROBE_TIMEOUT)),
+        )
+    return _Router
+
+
+def note_write(sticky_key) -> None:
+    """À appeler après un commit en écriture pour les lectures adhérentes de ``sticky_key``."""
+    router = replica_router()
+    if router is not None:
+        router.note_write(sticky_key)
+
+def db_connect(to: str, allow_uri: bool = False, readonly: bool = False, sticky_key=None) -> Connection:
+    """
+    Connexion à la base ``to``. Avec ``readonly=True`` et des réplicas configurés, le
+    ReplicaRouter choisit un réplica sain, ou le primaire en repli.
+    """
     global _Pool, _Pool_readonly
 
     maxconn = tools.config['db_maxconn_gevent'] if odoo.evented else tools.config['db_maxconn']
+    pool_options = {
+        'acquire_timeout': float(tools.config.get('db_pool_acquire_timeout', ACQUIRE_TIMEOUT)),
+        'validation_idle_age': float(tools.config.get('db_pool_validation_idle_age', VALIDATION_IDLE_AGE)),
+        'max_lifetime': float(tools.config.get('db_pool_max_lifetime', MAX_LIFETIME)),
+        'max_uses': int(tools.config.get('db_pool_max_uses', MAX_USES)),
+        'debug': bool(tools.config.get('db_pool_debug', False)),
+        'held_threshold': float(tools.config.get('db_pool_held_threshold', HELD_THRESHOLD)),
+        'prepared_cache_size': int(tools.config.get('db_prepared_cache_size', PREPARED_CACHE_SIZE)),
+    }
     if _Pool is None and not readonly:
-        _Pool = ConnectionPool(int(maxconn), readonly=False)
+        _Pool = ConnectionPool(int(maxconn), readonly=False, **pool_options)
     if _Pool_readonly is None and readonly:
-        _Pool_readonly = ConnectionPool(int(maxconn), readonly=True)
+        _Pool_readonly = ConnectionPool(int(maxconn), readonly=True, **pool_options)
+
+    router = replica_router() if readonly else None
+    if router is not None:
+        if router.is_sticky(sticky_key):
+            return db_connect(to, allow_uri)
+        db, info = connection_info_for(to, readonly=True)
+        if not allow_uri and db != to:
+            raise ValueError("URI connections are not allowed")
+        if 'dsn' not in info:
+            replica = router.choose(info)
+            if replica is None:
+                return db_connect(to, allow_uri)
+            return Connection(_Pool_readonly, db, router.connection_info(replica, info))
+        return Connection(_Pool_readonly, db, info)
+
+    db, info = connection_info_for(to, readonly)
 
-   db, info = connection_info_for(to, readonly)
-   
     if not allow_uri and db != to:
         raise ValueError("URI connections are not allowed")
 
@@ -211,7 +908,12 @@ def close_db(db_name: str):
     if _Pool:
         _Pool.close_all(connection_info_for(db_name)[1])
     if _Pool_readonly:
-        _Pool_readonly.close_all(connection_info_for(db_name, readonly=True)[1])
+        info = connection_info_for(db_name, readonly=True)[1]
+        if _Router is not None:
+            for replica in _Router.replicas:
+                _Pool_readonly.close_all(_Router.connection_info(replica, info))
+        else:
+            _Pool_readonly.close_all(info)
 
 
 def close_all():
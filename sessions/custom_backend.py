@@ -1,21 +1,32 @@
 import logging
+from datetime import timedelta
+from pathlib import Path
 
 from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib.sessions.backends.base import CreateError, SessionBase, UpdateError
 from django.core.exceptions import SuspiciousOperation
 from django.db import DatabaseError, IntegrityError, router, transaction
 from django.utils import timezone
 from django.utils.functional import cached_property
 
+from .purge import purge_expired_sessions
+
 
 class SessionStore(SessionBase):
     """
     Backend personnalisé pour la gestion des sessions Django en base de données,
     avec support synchrone et asynchrone.
+
+    Une sauvegarde sans modification de contenu (``modified`` faux, cas de
+    SESSION_SAVE_EVERY_REQUEST) ne réécrit que ``expire_date``, et rien du tout si la
+    nouvelle expiration reste dans SESSION_EXPIRY_WRITE_GRACE secondes de celle en base.
+    Les mutations d’objets imbriqués doivent marquer ``session.modified = True``.
     """
 
     def __init__(self, session_key=None):
         super().__init__(session_key)
+        self._loaded_expiry = None
 
     @classmethod
     def get_model_class(cls):
@@ -50,11 +61,51 @@ class SessionStore(SessionBase):
 
     def load(self):
         session = self._get_session_from_db()
-        return self.decode(session.session_data) if session else {}
+        return self._session_data(session)
 
     async def aload(self):
         session = await self._aget_session_from_db()
-        return self.decode(session.session_data) if session else {}
+        return self._session_data(session)
+
+    def _session_data(self, session):
+        if not session:
+            self._loaded_expiry = None
+            return {}
+        self._loaded_expiry = session.expire_date
+        return self.decode(session.session_data)
+
+    def _expiry_only_change(self, must_create):
+        """True si la sauvegarde ne modifie que l’expiration (session chargée, non modifiée)."""
+        return (
+            not must_create
+            and not self.modified
+            and self._loaded_expiry is not None
+            and hasattr(self, "_session_cache")
+        )
+
+    def _within_grace(self, expire_date):
+        grace = timedelta(seconds=getattr(settings, "SESSION_EXPIRY_WRITE_GRACE", 0))
+        return abs(expire_date - self._loaded_expiry) <= grace
+
+    def _save_expiry_only(self):
+        expire_date = self.get_expiry_date()
+        if self._within_grace(expire_date):
+            return True
+        using = router.db_for_write(self.model)
+        updated = self.model.objects.using(using).filter(session_key=self.session_key).update(expire_date=expire_date)
+        if updated:
+            self._loaded_expiry = expire_date
+        return bool(updated)
+
+    async def _asave_expiry_only(self):
+        expire_date = await self.aget_expiry_date()
+        if self._within_grace(expire_date):
+            return True
+        using = router.db_for_write(self.model)
+        updated = await self.model.objects.using(using).filter(session_key=self.session_key).aupdate(expire_date=expire_date)
+        if updated:
+            self._loaded_expiry = expire_date
+        return bool(updated)
 
     def exists(self, session_key):
         return self.model.objects.filter(session_key=session_key).exists()
@@ -99,6 +150,8 @@ class SessionStore(SessionBase):
     def save(self, must_create=False):
         if self.session_key is None:
             return self.create()
+        if self._expiry_only_change(must_create) and self._save_expiry_only():
+            return
         data = self._get_session(no_load=must_create)
         obj = self.create_model_instance(data)
         using = router.db_for_write(self.model, instance=obj)
@@ -117,10 +170,13 @@ class SessionStore(SessionBase):
             if not must_create:
                 raise UpdateError
             raise
+        self._loaded_expiry = obj.expire_date
 
     async def asave(self, must_create=False):
         if self.session_key is None:
             return await self.acreate()
+        if self._expiry_only_change(must_create) and await self._asave_expiry_only():
+            return
         data = await self._aget_session(no_load=must_create)
         obj = await self.acreate_model_instance(data)
         using = router.db_for_write(self.model, instance=obj)
@@ -144,6 +200,7 @@ class SessionStore(SessionBase):
             if not must_create:
                 raise UpdateError
             raise
+        self._loaded_expiry = obj.expire_date
 
     def delete(self, session_key=None):
         session_key = session_key or self.session_key
@@ -166,10 +223,18 @@ class SessionStore(SessionBase):
 
     @classmethod
     def clear_expired(cls):
-        cls.get_model_class().objects.filter(expire_date__lt=timezone.now()).delete()
+        """
+        Purge par lots (SESSION_PURGE_BATCH_SIZE, SESSION_PURGE_MAX_ROWS_PER_SECOND,
+        SESSION_PURGE_CHECKPOINT) au lieu d’un DELETE unique sur toute la table.
+        """
+        checkpoint = getattr(settings, "SESSION_PURGE_CHECKPOINT", None)
+        purge_expired_sessions(
+            cls.get_model_class(),
+            batch_size=getattr(settings, "SESSION_PURGE_BATCH_SIZE", 1000),
+            max_rows_per_second=getattr(settings, "SESSION_PURGE_MAX_ROWS_PER_SECOND", None),
+            checkpoint=Path(checkpoint) if checkpoint else None,
+        )
 
     @classmethod
     async def aclear_expired(cls):
-        await cls.get_model_class().objects.filter(
-            expire_date__lt=timezone.now()
-        ).adelete()
+        await sync_to_async(cls.clear_expired, thread_sensitive=False)()
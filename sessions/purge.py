@@ -0,0 +1,121 @@
+import logging
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import router
+from django.utils import timezone
+
+from monitoring.session_metrics import (
+    SESSION_PURGE_BATCHES, SESSION_PURGE_CACHE_KEYS, SESSION_PURGE_DELETED,
+    SESSION_PURGE_LAST_BATCH_TIMESTAMP, SESSION_PURGE_RATE,
+)
+
+logger = logging.getLogger("django.contrib.sessions")
+
+
+@dataclass
+class PurgeProgress:
+    deleted: int = 0
+    batches: int = 0
+    cache_keys: int = 0
+    last_key: str = ""
+    started_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.deleted / self.elapsed if self.elapsed > 0 else 0.0
+
+
+def _session_cache():
+    """Cache utilisé par core/sessions/sessionstore.py, s’il est configuré."""
+    alias = getattr(settings, "SESSION_CACHE_ALIAS", None)
+    if not alias or alias not in settings.CACHES:
+        return None, None
+    from core.sessions.sessionstore import KEY_PREFIX
+    return caches[alias], KEY_PREFIX
+
+
+def purge_expired_sessions(
+    model,
+    batch_size: int = 1000,
+    max_rows_per_second: Optional[float] = None,
+    pause: float = 0.0,
+    resume_from: str = "",
+    checkpoint: Optional[Path] = None,
+    purge_cache: bool = True,
+    progress_callback: Optional[Callable[[PurgeProgress], None]] = None,
+) -> PurgeProgress:
+    """
+    🧹 Supprime les sessions expirées par lots ordonnés sur la clé (keyset), un lot par transaction.
+
+    :param batch_size: nombre de sessions supprimées par lot.
+    :param max_rows_per_second: plafond de débit ; la purge dort entre deux lots pour le respecter.
+    :param pause: pause fixe (secondes) entre deux lots.
+    :param resume_from: reprend après cette clé de session.
+    :param checkpoint: fichier où la dernière clé traitée est enregistrée après chaque lot ;
+        s’il existe au démarrage, la purge reprend à partir de cette clé.
+    :param purge_cache: supprime aussi les clés correspondantes du cache de sessions.
+    :param progress_callback: appelé après chaque lot avec l’avancement.
+    """
+    if checkpoint is not None and not resume_from and checkpoint.exists():
+        resume_from = checkpoint.read_text(encoding="utf-8").strip()
+
+    now = timezone.now()  # figé : la purge se termine même si des sessions expirent pendant son exécution
+    using = router.db_for_write(model)
+    cache, key_prefix = _session_cache() if purge_cache else (None, None)
+    progress = PurgeProgress(last_key=resume_from)
+
+    while True:
+        keys = list(
+            model.objects.using(using)
+            .filter(expire_date__lt=now, session_key__gt=progress.last_key)
+            .order_by("session_key")
+            .values_list("session_key", flat=True)[:batch_size]
+        )
+        if not keys:
+            break
+
+        deleted, _ = model.objects.using(using).filter(session_key__in=keys, expire_date__lt=now).delete()
+        if cache is not None:
+            cache.delete_many([key_prefix + key for key in keys])
+            progress.cache_keys += len(keys)
+            SESSION_PURGE_CACHE_KEYS.inc(len(keys))
+
+        progress.deleted += deleted
+        progress.batches += 1
+        progress.last_key = keys[-1]
+        if checkpoint is not None:
+            checkpoint.write_text(progress.last_key, encoding="utf-8")
+
+        SESSION_PURGE_DELETED.inc(deleted)
+        SESSION_PURGE_BATCHES.inc()
+        SESSION_PURGE_RATE.set(progress.rows_per_second)
+        SESSION_PURGE_LAST_BATCH_TIMESTAMP.set(time.time())
+        logger.info(
+            "Purge sessions : %d supprimées en %d lots (%.0f lignes/s)",
+            progress.deleted, progress.batches, progress.rows_per_second,
+        )
+        if progress_callback is not None:
+            progress_callback(progress)
+
+        if len(keys) < batch_size:
+            break
+
+        delay = pause
+        if max_rows_per_second:
+            delay = max(delay, progress.deleted / max_rows_per_second - progress.elapsed)
+        if delay > 0:
+            time.sleep(delay)
+
+    if checkpoint is not None and checkpoint.exists():
+        checkpoint.unlink()
+    SESSION_PURGE_RATE.set(0)
+    return progress
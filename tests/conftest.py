@@ -0,0 +1,25 @@
+# 🧪 tests/conftest.py — Django minimal sur SQLite pour les tests des backends cache et session
+
+import os
+import tempfile
+
+try:
+    import django
+except ImportError:  # tests Django ignorés (pytest.importorskip dans chaque module)
+    django = None
+
+if django is not None:
+    from django.conf import settings
+
+    if not settings.configured:
+        settings.configure(
+            USE_TZ=True,
+            SECRET_KEY="tests",
+            INSTALLED_APPS=["django.contrib.sessions"],
+            DATABASES={"default": {
+                "ENGINE": "django.db.backends.sqlite3",
+                # Fichier et non :memory: : sync_to_async passe par un autre thread, donc une autre connexion.
+                "NAME": os.path.join(tempfile.mkdtemp(), "tests.sqlite3"),
+            }},
+        )
+        django.setup()
@@ -0,0 +1,42 @@
+# 🧪 tests/test_cache_serializers.py — Codec binaire du cache base de données
+
+import pytest
+
+from backend.cache.serializers import ValueCodec, get_codec
+
+
+def test_roundtrip_pickle_sans_compression():
+    codec = get_codec({})
+    value = {"plan": ["A", "B"], "version": 3}
+    data = codec.encode(value)
+    assert data[0] == 0
+    assert codec.decode(data) == value
+
+
+def test_compression_au_dela_du_seuil():
+    codec = get_codec({"COMPRESSOR": "zlib", "COMPRESS_MIN_SIZE": 64})
+    small, large = "x", "rapport " * 1000
+    assert codec.encode(small)[0] == 0
+    data = codec.encode(large)
+    assert data[0] != 0
+    assert len(data) < len(large)
+    assert codec.decode(data) == large
+
+
+def test_decodage_independant_du_compresseur_configure():
+    data = get_codec({"COMPRESSOR": "zlib", "COMPRESS_MIN_SIZE": 0}).encode("a" * 500)
+    assert get_codec({}).decode(data) == "a" * 500
+
+
+def test_serialiseur_json():
+    codec = get_codec({"SERIALIZER": "json"})
+    assert codec.decode(codec.encode({"ok": True})) == {"ok": True}
+
+
+def test_options_inconnues():
+    with pytest.raises(ValueError):
+        get_codec({"SERIALIZER": "yaml"})
+    with pytest.raises(ValueError):
+        get_codec({"COMPRESSOR": "brotli"})
+    with pytest.raises(ValueError):
+        ValueCodec(get_codec({}).serializer).decode(b"\x09abc")
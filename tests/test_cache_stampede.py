@@ -0,0 +1,41 @@
+# 🧪 tests/test_cache_stampede.py — Primitives anti-stampede du cache DB
+
+import threading
+import time
+from datetime import datetime, timedelta
+
+from backend.cache.stampede import KeyedLocks, should_refresh_early, unwrap, wrap
+
+
+def test_enveloppe_xfetch():
+    assert unwrap(wrap({"total": 3}, 2.5)) == ({"total": 3}, 2.5)
+    assert unwrap({"total": 3}) == ({"total": 3}, None)
+
+
+def test_rafraichissement_anticipe():
+    now = datetime(2026, 1, 1)
+    assert not should_refresh_early(now + timedelta(hours=1), 0.01, 1.0, now)
+    assert should_refresh_early(now - timedelta(seconds=1), 2.0, 1.0, now)
+    assert not should_refresh_early(now, None, 1.0, now)
+    assert not should_refresh_early(datetime.max, 2.0, 1.0, now)
+
+
+def test_verrous_par_cle_serialisent_les_calculs():
+    locks = KeyedLocks()
+    active, peak = [0], [0]
+
+    def work():
+        with locks.hold("dashboard"):
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+            time.sleep(0.01)
+            active[0] -= 1
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert peak[0] == 1
+    assert not locks._locks
@@ -0,0 +1,33 @@
+# 🧪 tests/test_content_archive.py — Archive adressée par contenu
+
+from modules import content_archive
+
+
+def test_titres_doublons_partagent_un_blob(tmp_path):
+    sha = "ab" * 32
+    content_archive.store(sha, "Premier titre", "texte extrait", root=tmp_path)
+    assert content_archive.lookup(sha, root=tmp_path) is not None
+
+    content_archive.store(sha, "Autre titre", None, root=tmp_path)
+    entry = content_archive.lookup(sha, root=tmp_path)
+    assert entry["titles"] == ["Premier titre", "Autre titre"]
+    assert entry["uploads"] == 2
+    assert len(list((tmp_path / "blobs").rglob("*.txt"))) == 1
+    assert content_archive.read_content("Autre titre", root=tmp_path) == "texte extrait"
+
+
+def test_lookup_ignore_blob_absent(tmp_path):
+    sha = "cd" * 32
+    blob = content_archive.store(sha, "Titre", "texte", root=tmp_path)
+    blob.unlink()
+    assert content_archive.lookup(sha, root=tmp_path) is None
+    assert content_archive.lookup("ef" * 32, root=tmp_path) is None
+
+
+def test_reference_ajoutee_malgre_blob_purge(tmp_path):
+    sha = "12" * 32
+    blob = content_archive.store(sha, "Titre", "texte", root=tmp_path)
+    blob.unlink()
+    content_archive.store(sha, "Autre titre", None, root=tmp_path)  # entrée existante : pas de stat du blob
+    with content_archive.locked_index(tmp_path) as index:
+        assert index[sha]["uploads"] == 2
@@ -0,0 +1,155 @@
+# 🧪 tests/test_database_cache.py — DatabaseCache et TieredDatabaseCache sur SQLite (asyncpg simulé)
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("django")
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from backend.cache.database_cache_backend import DatabaseCache
+from backend.cache.tiered_cache_backend import TieredDatabaseCache
+
+TABLE = "test_cache_table"
+
+
+@pytest.fixture
+def cache():
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {TABLE}")
+        cursor.execute(
+            f"CREATE TABLE {TABLE} (cache_key varchar(255) NOT NULL PRIMARY KEY, "
+            f"value text NOT NULL, expires datetime NOT NULL)"
+        )
+    return DatabaseCache(TABLE, {"OPTIONS": {"CULL_INTERVAL": 0}})
+
+
+def test_aller_retour_sync(cache):
+    cache.set("k", {"n": 1})
+    assert cache.get("k") == {"n": 1}
+    assert not cache.add("k", "autre")
+    assert cache.set_many({"a": 1, "b": 2}) == []
+    assert cache.get_many(["a", "b", "absente"]) == {"a": 1, "b": 2}
+    cache.delete_many(["a", "b"])
+    assert cache.get_many(["a", "b"]) == {}
+
+
+def test_aller_retour_async_sans_asyncpg(cache):
+    async def scenario():
+        assert await cache.aset("k", "valeur")
+        assert await cache.aget("k") == "valeur"
+        assert await cache.aget_many(["k", "absente"]) == {"k": "valeur"}
+        assert not await cache.aadd("k", "autre")
+        assert await cache.ahas_key("k")
+        assert await cache.adelete("k")
+        assert await cache.aget("k", "défaut") == "défaut"
+
+    asyncio.run(scenario())
+
+
+def test_clés_communes_sync_et_async(cache):
+    asyncio.run(cache.aset("k", 42))
+    assert cache.get("k") == 42
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT cache_key FROM {TABLE}")
+        assert [row[0] for row in cursor.fetchall()] == [cache.make_key("k")]
+
+
+def test_tiered_garde_le_niveau_local_sans_écriture(cache):
+    tiered = TieredDatabaseCache(TABLE, {"OPTIONS": {"CULL_INTERVAL": 0, "GENERATION_POLL_INTERVAL": 0}})
+    DatabaseCache._base_set(tiered, "set", tiered.make_and_validate_key("k"), "local", 300)
+    assert tiered.get("k") == "local"
+    # Sans jeton de génération publié, le niveau local survit aux sondages successifs.
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLE}")
+    assert tiered.get("k") == "local"
+    assert asyncio.run(tiered.aget("k")) == "local"
+
+
+class _FakePool:
+    """Pool asyncpg simulé : attendable sans être une coroutine, comme asyncpg.Pool."""
+
+    def __init__(self):
+        self.rows = {}
+
+    def __await__(self):
+        if False:
+            yield
+        return self
+
+    async def execute(self, sql, *params):
+        assert "%s" not in sql
+        if sql.startswith("DELETE"):
+            found = [key for key in params[0] if self.rows.pop(key, None) is not None]
+            return f"DELETE {len(found)}"
+        key, value = params[0], params[1]
+        if sql.startswith("INSERT") and len(params) == 4 and key in self.rows:
+            return "INSERT 0 0"
+        self.rows[key] = value
+        return "INSERT 0 1"
+
+    async def fetch(self, sql, keys):
+        return [(key, self.rows[key]) for key in keys if key in self.rows]
+
+    async def fetchrow(self, sql, key):
+        return (1,) if key in self.rows else None
+
+
+def test_chemin_asyncpg_natif(cache, monkeypatch):
+    import types
+
+    from backend.cache import database_cache_backend
+
+    pool = _FakePool()
+    fake_asyncpg = types.SimpleNamespace(
+        create_pool=lambda **kwargs: pool,
+        PostgresError=type("PostgresError", (Exception,), {}),
+    )
+    monkeypatch.setattr(database_cache_backend, "asyncpg", fake_asyncpg)
+    monkeypatch.setattr(cache, "_uses_asyncpg", lambda db: True)
+
+    async def scenario():
+        assert await cache.aset("k", {"n": 1})
+        assert await cache.aget("k") == {"n": 1}
+        assert not await cache.aadd("k", "autre")
+        assert await cache.ahas_key("k")
+        assert await cache.adelete("k")
+        assert await cache.aget("k", "défaut") == "défaut"
+
+    asyncio.run(scenario())
+    assert pool.rows == {}
+
+
+def tiered_worker():
+    return TieredDatabaseCache(TABLE, {"OPTIONS": {"CULL_INTERVAL": 0, "GENERATION_POLL_INTERVAL": 0}})
+
+
+def test_tiered_get_or_set_servi_par_le_niveau_local(cache):
+    tiered = tiered_worker()
+    assert tiered.get_or_set("k", lambda: "calculée") == "calculée"
+    assert tiered.get_or_set("k", lambda: "recalculée") == "calculée"  # relue en base, copiée en local
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLE} WHERE cache_key = %s", [tiered.make_key("k")])
+    assert tiered.get_or_set("k", lambda: "recalculée") == "calculée"
+
+
+def test_tiered_ecriture_n_invalide_que_son_compartiment(cache):
+    writer, reader = tiered_worker(), tiered_worker()
+    first = "a"
+    other = next(
+        key for key in map(str, range(100))
+        if reader._bucket(reader.make_key(key)) != reader._bucket(reader.make_key(first))
+    )
+    writer.set_many({first: 1, other: 1})
+    assert reader.get_many([first, other]) == {first: 1, other: 1}
+
+    with CaptureQueriesContext(connection) as queries:
+        writer.set(first, 2)
+    assert len(queries) == 1  # valeur et jeton de génération dans la même requête
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLE} WHERE cache_key = %s", [reader.make_key(other)])
+    assert reader.get(first) == 2  # compartiment modifié : relu en base
+    assert reader.get(other) == 1  # autre compartiment : copie locale conservée
@@ -0,0 +1,182 @@
+# 🧪 tests/test_db_pool.py — ConnectionPool (file d’attente, remise, éviction, validation, stats)
+
+import threading
+import time
+
+import pytest
+
+db = pytest.importorskip("service.db")
+psycopg2 = db.psycopg2
+
+DB1 = {"database": "db1"}
+DB2 = {"database": "db2"}
+
+
+class FakeConnection:
+    """Connexion psycopg2 simulée : état de transaction pilotable, reset() observable."""
+
+    def __init__(self, database):
+        self.dsn = f"dbname={database}"
+        self.closed = 0
+        self.autocommit = False
+        self.status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+        self.resets = 0
+        self.fail_reset = False
+
+    def get_backend_pid(self):
+        return id(self)
+
+    def get_transaction_status(self):
+        return self.status
+
+    def set_session(self, **kwargs):
+        pass
+
+    def reset(self):
+        self.resets += 1
+        if self.fail_reset:
+            raise psycopg2.OperationalError("server closed the connection unexpectedly")
+        self.status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+
+@pytest.fixture
+def opened(monkeypatch):
+    connections = []
+
+    def connect(connection_factory=None, **info):
+        cnx = FakeConnection(info["database"])
+        connections.append(cnx)
+        return cnx
+
+    monkeypatch.setattr(psycopg2, "connect", connect)
+    return connections
+
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "condition jamais atteinte"
+        time.sleep(0.005)
+
+
+def test_connexion_rendue_reutilisee(opened):
+    pool = db.ConnectionPool(maxconn=2)
+    cnx = pool.borrow(DB1)
+    pool.give_back(cnx)
+
+    assert pool.borrow(DB1) is cnx
+    assert len(opened) == 1
+    assert cnx.resets == 0  # rendue hors transaction : pas de reset
+
+
+def test_file_fifo_et_remise_directe(opened):
+    pool = db.ConnectionPool(maxconn=1, acquire_timeout=2)
+    cnx = pool.borrow(DB1)
+    served = []
+
+    def borrower(name):
+        borrowed = pool.borrow(DB1)
+        served.append((name, borrowed))
+        pool.give_back(borrowed)
+
+    first = threading.Thread(target=borrower, args=("premier",))
+    first.start()
+    wait_for(lambda: pool.queue_depth == 1)
+    second = threading.Thread(target=borrower, args=("second",))
+    second.start()
+    wait_for(lambda: pool.queue_depth == 2)
+
+    pool.give_back(cnx)
+    first.join()
+    second.join()
+
+    assert served == [("premier", cnx), ("second", cnx)]
+    assert len(opened) == 1
+    stats = pool.stats()
+    assert stats["waits"] == 2 and stats["max_queue_depth"] == 2 and stats["timeouts"] == 0
+
+
+def test_delai_d_attente_depasse(opened):
+    pool = db.ConnectionPool(maxconn=1)
+    pool.borrow(DB1)
+
+    with pytest.raises(db.PoolError):
+        pool.borrow(DB1, timeout=0.05)
+
+    stats = pool.stats()
+    assert stats["timeouts"] == 1
+    assert stats["waiters"] == 0
+
+
+def test_eviction_de_l_inactive_d_un_autre_dsn(opened):
+    pool = db.ConnectionPool(maxconn=1)
+    first = pool.borrow(DB1)
+    pool.give_back(first)
+
+    second = pool.borrow(DB2)
+
+    assert second is not first
+    assert first.closed
+    assert pool.stats()["closed"] == 1
+
+
+def test_attente_servie_par_un_autre_dsn(opened):
+    pool = db.ConnectionPool(maxconn=1, acquire_timeout=2)
+    first = pool.borrow(DB1)
+    served = []
+    waiter = threading.Thread(target=lambda: served.append(pool.borrow(DB2)))
+    waiter.start()
+    wait_for(lambda: pool.queue_depth == 1)
+
+    pool.give_back(first)  # attendue pour db2 : fermée, sa place revient à l’emprunteur
+    waiter.join()
+
+    assert first.closed
+    assert served and served[0].dsn == "dbname=db2"
+
+
+def test_validation_au_reemploi(opened):
+    pool = db.ConnectionPool(maxconn=1)
+    cnx = pool.borrow(DB1)
+    cnx.status = psycopg2.extensions.TRANSACTION_STATUS_INTRANS
+    pool.give_back(cnx)
+
+    assert pool.borrow(DB1) is cnx
+    assert cnx.resets == 1  # rendue en transaction : reset au réemploi
+
+    cnx.status = psycopg2.extensions.TRANSACTION_STATUS_INTRANS
+    cnx.fail_reset = True
+    pool.give_back(cnx)
+    replacement = pool.borrow(DB1)
+
+    assert replacement is not cnx and cnx.closed
+    stats = pool.stats()
+    assert stats["reset_failures"] == 1
+    assert stats["created"] == 2 and stats["closed"] == 1
+
+
+def test_connexion_recyclee_apres_max_uses(opened):
+    pool = db.ConnectionPool(maxconn=1, max_uses=2)
+    cnx = pool.borrow(DB1)
+    pool.give_back(cnx)
+    assert pool.borrow(DB1) is cnx
+    pool.give_back(cnx)  # deuxième emprunt atteint : fermée au retour
+
+    assert cnx.closed
+    assert pool.borrow(DB1) is not cnx
+
+
+def test_stats_par_base(opened):
+    pool = db.ConnectionPool(maxconn=4)
+    a = pool.borrow(DB1)
+    pool.borrow(DB1)
+    pool.borrow(DB2)
+    pool.give_back(a)
+
+    stats = pool.stats()
+    assert stats["in_use"] == 2 and stats["idle"] == 1 and stats["created"] == 3
+    assert stats["per_dsn"] == {"db1": {"in_use": 1, "idle": 1}, "db2": {"in_use": 1, "idle": 0}}
+    assert [held["dsn"] for held in pool.held_connections()] == ["db1", "db2"]
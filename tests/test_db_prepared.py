@@ -0,0 +1,82 @@
+# 🧪 tests/test_db_prepared.py — Requêtes préparées par connexion (cache LRU, DEALLOCATE)
+
+from collections import OrderedDict
+
+import pytest
+
+db = pytest.importorskip("service.db")
+
+
+class FakeCursor:
+    def __init__(self, log):
+        self.log = log
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def execute(self, query, params=None):
+        self.log.append((query, params))
+
+
+class FakeConnection:
+    """Tient lieu de PsycoConnection : seules les méthodes testées y sont appelées."""
+
+    def __init__(self, cache_size):
+        self.prepared_cache_size = cache_size
+        self._prepared = OrderedDict()
+        self.autocommit = False
+        self.log = []
+
+    def cursor(self):
+        return FakeCursor(self.log)
+
+
+def execute(cnx, query, params=()):
+    db.PsycoConnection.execute_prepared(cnx, cnx.cursor(), query, params)
+
+
+def test_requete_preparee_une_seule_fois():
+    cnx = FakeConnection(cache_size=2)
+    execute(cnx, "SELECT name FROM res_users WHERE id = %s", (1,))
+    execute(cnx, "SELECT name FROM res_users WHERE id = %s", (2,))
+
+    prepare, first, second = cnx.log
+    name = cnx._prepared["SELECT name FROM res_users WHERE id = %s"]
+    assert prepare == (f"PREPARE {name} AS SELECT name FROM res_users WHERE id = $1", None)
+    assert first == (f"EXECUTE {name} (%s)", (1,))
+    assert second == (f"EXECUTE {name} (%s)", (2,))
+
+
+def test_eviction_lru_desalloue_la_plus_ancienne():
+    cnx = FakeConnection(cache_size=1)
+    execute(cnx, "SELECT 1")
+    evicted = cnx._prepared["SELECT 1"]
+    execute(cnx, "SELECT 2")
+
+    assert (f"DEALLOCATE {evicted}", None) in cnx.log
+    assert list(cnx._prepared) == ["SELECT 2"]
+
+
+def test_cache_desactive_ou_parametres_nommes():
+    cnx = FakeConnection(cache_size=0)
+    execute(cnx, "SELECT %s", (1,))
+    cnx.prepared_cache_size = 4
+    db.PsycoConnection.execute_prepared(cnx, cnx.cursor(), "SELECT %(id)s", {"id": 1})
+
+    assert cnx.log == [("SELECT %s", (1,)), ("SELECT %(id)s", {"id": 1})]
+    assert not cnx._prepared
+
+
+def test_reset_desalloue_cote_serveur():
+    cnx = FakeConnection(cache_size=2)
+    execute(cnx, "SELECT 1")
+    cnx.log.clear()
+
+    db.PsycoConnection._deallocate_all(cnx)
+
+    assert cnx.log == [("DEALLOCATE ALL", None)]
+    assert not cnx._prepared
+    assert cnx.autocommit is False
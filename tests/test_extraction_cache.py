@@ -0,0 +1,58 @@
+# 🧪 tests/test_extraction_cache.py — Cache persistant des extractions PDF
+
+import os
+
+from modules.pdf.extraction_cache import ExtractionCache
+
+
+def test_pages_relues_depuis_la_table_des_decalages(tmp_path):
+    cache = ExtractionCache(tmp_path)
+    key = cache.make_key("ab" * 32, "fitz.get_text", {"mode": "text"}, version="1.24.0")
+    assert cache.get(key) is None
+
+    pages = ["première page", "", "troisième page é" * 100]
+    cache.put(key, pages)
+    assert cache.get(key) == pages
+    assert cache.get_page(key, 2) == pages[2]
+    assert cache.get_page(key, 3) is None
+
+
+def test_cle_depend_de_la_version_et_des_options():
+    base = ExtractionCache.make_key("ab" * 32, "fitz.get_text", {"mode": "text"}, version="1.24.0")
+    assert base != ExtractionCache.make_key("ab" * 32, "fitz.get_text", {"mode": "text"}, version="1.25.0")
+    assert base != ExtractionCache.make_key("ab" * 32, "fitz.get_text", {"mode": "blocks"}, version="1.24.0")
+
+
+def test_eviction_lru_et_rapport(tmp_path):
+    cache = ExtractionCache(tmp_path, max_bytes=10_000)
+    keys = [cache.make_key(str(i) * 64, "x", version="1") for i in range(4)]
+    for i, key in enumerate(keys):
+        cache.put(key, [os.urandom(2000).hex()])  # hex aléatoire : ~2,2 Ko une fois compressé
+        os.utime(cache._path(key), (i, i))
+    cache.get(keys[0])  # rafraîchit la plus ancienne : c’est keys[1] qui part
+
+    cache.put(cache.make_key("f" * 64, "x", version="1"), [os.urandom(2000).hex()])
+    assert cache.get(keys[0]) is not None
+    assert cache.get(keys[1]) is None
+
+    report = cache.report()
+    assert report["bytes"] <= 10_000
+    assert report["hits"] == 2 and report["misses"] == 1
+    assert report["hit_rate"] == 2 / 3
+
+
+def test_volume_et_statistiques_partages_entre_processus(tmp_path):
+    # Deux instances sur la même racine : comme deux workers d’extraction.
+    worker, other = ExtractionCache(tmp_path, max_bytes=10_000), ExtractionCache(tmp_path, max_bytes=10_000)
+    keys = [worker.make_key(str(i) * 64, "x", version="1") for i in range(4)]
+    for i, key in enumerate(keys):
+        worker.put(key, [os.urandom(2000).hex()])
+        os.utime(worker._path(key), (i, i))
+    assert worker.get(keys[3]) is not None
+
+    other.put(other.make_key("f" * 64, "x", version="1"), [os.urandom(2000).hex()])
+    assert worker.get(keys[0]) is None  # évincée par l’autre instance
+
+    report = ExtractionCache(tmp_path).report()  # sans flush ni atexit
+    assert report["bytes"] <= 10_000
+    assert report["hits"] == 1 and report["misses"] == 1
@@ -1,5 +1,7 @@
 # 🧪 tests/test_main_api.py — Tests des endpoints cockpit API
 
+import time
+
 from fastapi.testclient import TestClient
 from main_api import app
 from pathlib import Path
@@ -30,8 +32,17 @@ def test_upload_and_archive():
             },
             files={"file": ("sample.pdf", f, "application/pdf")}
         )
-    assert res.status_code == 200
-    assert "cockpitified" in res.json()["message"]
+    assert res.status_code == 202
+    job_id = res.json()["job_id"]
+    assert len(res.json()["sha256"]) == 64
+
+    for _ in range(100):
+        job = client.get(f"/jobs/{job_id}").json()
+        if job["status"] in ("done", "failed"):
+            break
+        time.sleep(0.1)
+    assert job["status"] == "done"
+    assert "cockpitified" in job["message"]
 
     res2 = client.get("/archive/TestDoc")
     assert res2.status_code == 200
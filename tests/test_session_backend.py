@@ -0,0 +1,92 @@
+# 🧪 tests/test_session_backend.py — SessionStore : écriture de l’expiration seule et délai de grâce
+
+import asyncio
+from datetime import timedelta
+
+import pytest
+
+pytest.importorskip("django")
+
+from asgiref.sync import sync_to_async
+from django.contrib.sessions.models import Session
+from django.db import connection
+from django.test import override_settings
+from django.utils import timezone
+
+from sessions.custom_backend import SessionStore
+
+DAY = 24 * 3600
+
+
+@pytest.fixture
+def session_key():
+    with connection.schema_editor() as editor:
+        editor.execute(f"DROP TABLE IF EXISTS {Session._meta.db_table}")
+        editor.create_model(Session)
+    store = SessionStore()
+    store["panier"] = [1, 2]
+    store.create()
+    # Expiration en base rapprochée : toute sauvegarde la repousse d’environ deux semaines.
+    Session.objects.filter(session_key=store.session_key).update(expire_date=timezone.now() + timedelta(days=1))
+    return store.session_key
+
+
+def stored(session_key):
+    return Session.objects.get(session_key=session_key)
+
+
+def tamper(session_key):
+    """Écriture concurrente du contenu : elle doit survivre à une sauvegarde de l’expiration seule."""
+    Session.objects.filter(session_key=session_key).update(session_data=SessionStore().encode({"autre": 1}))
+
+
+@override_settings(SESSION_EXPIRY_WRITE_GRACE=60)
+def test_sauvegarde_sans_modification_ne_reecrit_que_l_expiration(session_key):
+    store = SessionStore(session_key)
+    assert store["panier"] == [1, 2]
+    before = stored(session_key).expire_date
+    tamper(session_key)
+
+    store.save()
+
+    row = stored(session_key)
+    assert row.expire_date > before + timedelta(days=7)
+    assert SessionStore().decode(row.session_data) == {"autre": 1}
+
+
+@override_settings(SESSION_EXPIRY_WRITE_GRACE=30 * DAY)
+def test_expiration_dans_le_delai_de_grace_non_ecrite(session_key):
+    store = SessionStore(session_key)
+    assert store["panier"] == [1, 2]
+    before = stored(session_key).expire_date
+
+    store.save()
+
+    assert stored(session_key).expire_date == before
+
+
+@override_settings(SESSION_EXPIRY_WRITE_GRACE=30 * DAY)
+def test_session_modifiee_reecrite_en_entier(session_key):
+    store = SessionStore(session_key)
+    store["panier"] = [3]
+    tamper(session_key)
+
+    store.save()
+
+    assert SessionStore().decode(stored(session_key).session_data) == {"panier": [3]}
+
+
+@override_settings(SESSION_EXPIRY_WRITE_GRACE=60)
+def test_asave_ne_reecrit_que_l_expiration(session_key):
+    async def scenario():
+        store = SessionStore(session_key)
+        assert await store.aget("panier") == [1, 2]
+        await sync_to_async(tamper)(session_key)
+        await store.asave()
+
+    before = stored(session_key).expire_date
+    asyncio.run(scenario())
+
+    row = stored(session_key)
+    assert row.expire_date > before + timedelta(days=7)
+    assert SessionStore().decode(row.session_data) == {"autre": 1}
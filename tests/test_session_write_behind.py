@@ -0,0 +1,77 @@
+# 🧪 tests/test_session_write_behind.py — Écriture différée des sessions
+
+import time
+
+from core.sessions.write_behind import WriteBehindQueue
+
+
+class Recorder:
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+
+    def __call__(self, records):
+        if self.fail:
+            raise RuntimeError("base indisponible")
+        self.batches.append(list(records))
+
+
+def test_ecritures_fusionnees_par_session():
+    flushed = Recorder()
+    queue = WriteBehindQueue(flushed, max_staleness=60)
+    queue.enqueue("abc", ("v1", 1))
+    queue.enqueue("abc", ("v2", 2))
+    queue.enqueue("def", ("v1", 1))
+
+    assert queue.pending("abc") == ("v2", 2)
+    assert queue.flush() == 2
+    assert flushed.batches == [[("abc", ("v2", 2)), ("def", ("v1", 1))]]
+    assert queue.pending("abc") is None
+    queue.stop()
+
+
+def test_suppression_retire_l_ecriture_en_attente():
+    flushed = Recorder()
+    queue = WriteBehindQueue(flushed, max_staleness=60)
+    queue.enqueue("abc", ("v1", 1))
+    queue.discard("abc")
+    assert queue.flush() == 0
+    queue.stop()
+    assert flushed.batches == []
+
+
+def test_echec_remet_en_file_sans_ecraser_les_versions_recentes():
+    flushed = Recorder(fail=True)
+    queue = WriteBehindQueue(flushed, max_staleness=60)
+    queue.enqueue("abc", ("v1", 1))
+    assert queue.flush() == 0
+    assert queue.pending("abc") == ("v1", 1)
+
+    queue.enqueue("abc", ("v2", 2))
+    flushed.fail = False
+    queue.stop()
+    assert flushed.batches == [[("abc", ("v2", 2))]]
+
+
+def test_file_saturee_refuse_et_arret_vide_la_file():
+    flushed = Recorder()
+    queue = WriteBehindQueue(flushed, max_staleness=60, max_pending=1)
+    with queue._flush_lock:  # bloque le flusher réveillé par la saturation
+        assert queue.enqueue("a", 1)
+        assert queue.enqueue("b", 2)
+        assert not queue.enqueue("c", 3)
+        assert queue.enqueue("a", 4)  # une session déjà en file peut toujours être mise à jour
+    queue.stop()
+    assert not queue.enqueue("d", 5)
+    assert sorted(key for batch in flushed.batches for key, _ in batch) == ["a", "b"]
+
+
+def test_flusher_ecrit_apres_le_delai_maximal():
+    flushed = Recorder()
+    queue = WriteBehindQueue(flushed, max_staleness=0.05)
+    queue.enqueue("abc", ("v1", 1))
+    deadline = time.monotonic() + 1
+    while not flushed.batches and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert flushed.batches == [[("abc", ("v1", 1))]]
+    queue.stop()